@@ -1,5 +1,6 @@
 import streamlit as st
 from predictor import LolPredictor
+from cache import PredictionCache
 
 st.set_page_config(
     page_title="LoL Match Predictor", 
@@ -28,7 +29,19 @@ st.markdown("""
 
 @st.cache_resource
 def load_predictor():
-    return LolPredictor()
+    # models load in the background while the draft is being picked
+    # resubmitted matchups are served from the shared result cache
+    return LolPredictor(warm_up=True, cache=PredictionCache(maxsize=1024))
+
+# rosters only change with the team, most recently seen first so the current roster is the default
+@st.cache_data
+def team_roster(team_name):
+    return load_predictor().get_team_players(team_name, order="recent")
+
+# the champion lists are the same for every session, built once and shared
+@st.cache_resource
+def champion_options(role):
+    return (*load_predictor().get_champions(role), "Custom Input")
 
 def main():
     predictor = load_predictor()
@@ -73,6 +86,13 @@ def main():
 
     st.markdown("---")
 
+    draft(predictor, selected_patch, selected_region, blue_team_name, red_team_name)
+
+
+# the draft, predict button and sweep rerun on their own when one of their widgets changes,
+# only changing the teams, region or patch reruns the whole page
+@st.fragment
+def draft(predictor, selected_patch, selected_region, blue_team_name, red_team_name):
     # initialize variables
     roles = ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]
     blue_players = {}
@@ -81,8 +101,8 @@ def main():
     red_champions = {}
 
     # get all players from blue and red team
-    blue_team_players = predictor.get_team_players(blue_team_name)
-    red_team_players = predictor.get_team_players(red_team_name)
+    blue_team_players = team_roster(blue_team_name)
+    red_team_players = team_roster(red_team_name)
 
     col_blue, col_role, col_red = st.columns([3, 1, 3])
     # add player and champion headers for columns
@@ -118,7 +138,7 @@ def main():
             player_col, champ_col = st.columns(2)
                         
             with player_col:
-                player_options = blue_team_players.get(role, []) + ["Custom Input"]
+                player_options = blue_team_players[role] + ["Custom Input"]
                 selected_player = st.selectbox(
                     "Player", player_options, key=f"blue_{role}_player_select", label_visibility="collapsed"  
                 )
@@ -130,8 +150,7 @@ def main():
                     blue_players[role] = selected_player
             
             with champ_col:
-                champion_options = predictor.get_champions(role) + ["Custom Input"]
-                selected_champion = st.selectbox("Champion",champion_options,key=f"blue_{role}_champion_select", label_visibility="collapsed"  # Hide label
+                selected_champion = st.selectbox("Champion",champion_options(role),key=f"blue_{role}_champion_select", label_visibility="collapsed"  # Hide label
                 )
                 
                 if selected_champion == "Custom Input":
@@ -146,7 +165,7 @@ def main():
             champ_col, player_col = st.columns(2)
             
             with player_col:
-                player_options = red_team_players.get(role, []) + ["Custom Input"]
+                player_options = red_team_players[role] + ["Custom Input"]
                 selected_player = st.selectbox("Player",player_options, key=f"red_{role}_player_select",label_visibility="collapsed"  # Hide label
                 )
                 
@@ -156,8 +175,7 @@ def main():
                     red_players[role] = selected_player
             
             with champ_col:
-                champion_options = predictor.get_champions(role) + ["Custom Input"]
-                selected_champion = st.selectbox("Champion", champion_options, key=f"red_{role}_champion_select", label_visibility="collapsed"  # Hide label
+                selected_champion = st.selectbox("Champion", champion_options(role), key=f"red_{role}_champion_select", label_visibility="collapsed"  # Hide label
                 )
                 
                 if selected_champion == "Custom Input":
@@ -169,33 +187,34 @@ def main():
         
         st.write("")
 
+    # create team dictionaries
+    blue_team_dict = {
+        "team_name": blue_team_name,
+        "players": blue_players,
+        "champions": blue_champions 
+    }
+    
+    red_team_dict = {
+        "team_name": red_team_name,
+        "players": red_players,
+        "champions": red_champions 
+    }
+    
+    # create match info using predictor function
+    match_info = predictor.create_match_info(
+        patch=selected_patch,
+        region=selected_region,
+        blue_team=blue_team_dict,
+        red_team=red_team_dict
+    )
+
     # prediction Button
     if st.button(" PREDICT MATCH OUTCOME", type="primary", use_container_width=True):
         
-        # create team dictionaries
-        blue_team_dict = {
-            "team_name": blue_team_name,
-            "players": blue_players,
-            "champions": blue_champions 
-        }
-        
-        red_team_dict = {
-            "team_name": red_team_name,
-            "players": red_players,
-            "champions": red_champions 
-        }
-        
-        # create match info using predictor function
-        match_info = predictor.create_match_info(
-            patch=selected_patch,
-            region=selected_region,
-            blue_team=blue_team_dict,
-            red_team=red_team_dict
-        )
-        
-        # make predictions
-        voting_result = predictor.predict_voting(match_info)
-        elastic_result = predictor.predict_elastic(match_info)
+        # both models score the match from one feature build
+        results = predictor.predict_models([match_info], ["voting", "elastic"])
+        voting_result = results["voting"][0]
+        elastic_result = results["elastic"][0]
         
         # display Results
         st.write("<div style='text-align: center;'>Prediction Results</div>", unsafe_allow_html=True)
@@ -231,8 +250,42 @@ def main():
             else:
                 st.error(f"{red_team_name.upper()} predicted to win")
                 st.metric("Winner Probability", f"{red_prob_e:.1%}")
-                
-                
+
+    show_sweep(predictor, match_info, roles)
+
+
+# ranks every champion (or roster player) for one side and role with the rest of the draft unchanged
+def show_sweep(predictor, match_info, roles):
+    with st.expander("What-if sweep"):
+        side_col, role_col, kind_col = st.columns(3)
+        with side_col:
+            side = st.selectbox("Side", ["blue", "red"], format_func=str.capitalize, key="sweep_side")
+        with role_col:
+            role = st.selectbox("Role", roles, key="sweep_role")
+        with kind_col:
+            kind = st.selectbox("Change", ["champion", "player"], format_func=str.capitalize, key="sweep_kind")
+
+        if st.button("Run sweep", use_container_width=True):
+            rows = predictor.sweep(match_info, side, role, kind)
+            team_name = match_info[f"{side}_team"]["team_name"]
+            # win probabilities of the swept side, best option first
+            table = [
+                {
+                    kind.capitalize(): row["name"],
+                    "Voting Ensemble": 100 * (row["voting"] if side == "blue" else 1 - row["voting"]),
+                    "Elastic Net": 100 * (row["elastic"] if side == "blue" else 1 - row["elastic"])
+                }
+                for row in rows
+            ]
+            st.caption(f"{team_name.upper()} win probability with each {kind} at {role}")
+            st.dataframe(
+                table, hide_index=True, use_container_width=True,
+                column_config={
+                    "Voting Ensemble": st.column_config.NumberColumn(format="%.1f%%"),
+                    "Elastic Net": st.column_config.NumberColumn(format="%.1f%%")
+                }
+            )
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
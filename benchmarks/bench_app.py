@@ -0,0 +1,118 @@
+# times streamlit reruns of the app with AppTest: the cold first run, a rerun after a champion change and a predict click
+# the time is taken on the script thread from SCRIPT_STARTED to the script stopping, AppTest's own polling for the
+# result would otherwise dominate. AppTest always reruns the whole script, so the partial rerun a draft edit triggers
+# in a browser is timed by running the draft fragment on its own. every app runs in a fresh interpreter so the first
+# run pays the predictor load
+# run from the repo root: python -m benchmarks.bench_app --before old_app.py
+# (e.g. git show <commit>:app.py > old_app.py for the app before the draft became a fragment)
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# seconds the last script run took on its thread
+script_times = []
+
+
+# AppTest makes a new LocalScriptRunner every run, each one gets a listener timing its script
+def time_script_runs():
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    init = LocalScriptRunner.__init__
+
+    def timed_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        started = []
+
+        def on_event(sender, event, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                started.append(time.perf_counter())
+            elif event.name.startswith("SCRIPT_STOPPED") and started:
+                script_times.append(time.perf_counter() - started.pop())
+
+        self.on_event.connect(on_event, weak=False)
+
+    LocalScriptRunner.__init__ = timed_init
+
+
+# the draft fragment as its own script, with the same teams the full app starts on
+def draft_only():
+    import app
+    predictor = app.load_predictor()
+    teams = predictor.get_teams()
+    app.draft(predictor, predictor.get_patches()[-1], predictor.get_regions()[0], teams[0], teams[1])
+
+
+# changes blue mid to the next champion every round so predictions aren't served from the result cache
+def time_reruns(at, champions, rounds, click=False):
+    times = []
+    for i in range(rounds):
+        at.selectbox(key="blue_MID_champion_select").set_value(champions[i % len(champions)])
+        if click:
+            at.button[0].click()
+        at.run()
+        times.append(script_times[-1])
+        assert not at.exception, at.exception
+    return min(times)
+
+
+def run_child(app_path, rounds):
+    from streamlit.testing.v1 import AppTest
+
+    warnings.filterwarnings("ignore")
+    time_script_runs()
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.run()
+    first_run = script_times[-1]
+    assert not at.exception, at.exception
+
+    champions = [option for option in at.selectbox(key="blue_MID_champion_select").options if option != "Custom Input"]
+    results = {
+        "first_run": first_run,
+        "champion_change": time_reruns(at, champions, rounds),
+        "predict_click": time_reruns(at, champions[::-1], rounds, click=True)
+    }
+
+    with open(app_path) as f:
+        has_fragment = "@st.fragment" in f.read()
+    if has_fragment:
+        draft = AppTest.from_function(draft_only, default_timeout=120)
+        draft.run()
+        results["fragment_champion_change"] = time_reruns(draft, champions, rounds)
+        results["fragment_predict_click"] = time_reruns(draft, champions[1::2], rounds, click=True)
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--before", help="an earlier app.py to compare with")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.rounds)
+        return
+
+    runs = [("before", args.before)] if args.before else []
+    runs.append(("after", args.app))
+    print(f"{'app':>7} {'first run':>10} {'champion change':>16} {'predict click':>14}  (best of {args.rounds} reruns)")
+    for name, app_path in runs:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_app", "--child", os.path.abspath(app_path), "--rounds", str(args.rounds)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{name:>7} {result['first_run'] * 1000:>8.0f}ms {result['champion_change'] * 1000:>14.0f}ms {result['predict_click'] * 1000:>12.0f}ms")
+        if "fragment_champion_change" in result:
+            print(f"{'':>7} {'fragment':>10} {result['fragment_champion_change'] * 1000:>14.0f}ms {result['fragment_predict_click'] * 1000:>12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# compares the compiled inference backend with the fitted sklearn pipelines it is built from
+# single row latency and batched throughput of predict_proba are timed for both, tests/test_inference.py checks
+# that the probabilities agree
+# run from the repo root: python -m benchmarks.bench_inference
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.common import best_of, make_match_infos
+from predictor import LolPredictor
+
+
+# median seconds of one predict_proba call on a single row
+def single_row_latency(predict, rows, repeat):
+    times = []
+    for _ in range(repeat):
+        for row in rows:
+            start = time.perf_counter()
+            predict(row)
+            times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-rows", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    predictor = LolPredictor(backend="compiled")
+    features = predictor.build_feature_matrix(make_match_infos(predictor, args.latency_rows))
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'model':>8} {'rows':>6} {'sklearn':>12} {'compiled':>12} {'speedup':>8}")
+    for name in predictor.registry.names():
+        compiled = predictor.get_model(name)
+        model = compiled.sklearn_model
+        rows = [features[i:i + 1] for i in range(args.latency_rows)]
+        sklearn_latency = single_row_latency(lambda row: model.predict_proba(predictor.model_input(model, row)), rows, args.repeat)
+        compiled_latency = single_row_latency(compiled.predict_proba, rows, args.repeat)
+        print(f"{name:>8} {1:>6} {sklearn_latency * 1e6:>10.1f}us {compiled_latency * 1e6:>10.1f}us {sklearn_latency / compiled_latency:>7.1f}x")
+
+        for n in args.sizes:
+            batch = predictor.build_feature_matrix(make_match_infos(predictor, n, seed=n))
+            sklearn_time, _ = best_of(lambda: model.predict_proba(predictor.model_input(model, batch)), args.repeat)
+            compiled_time, _ = best_of(lambda: compiled.predict_proba(batch), args.repeat)
+            print(f"{name:>8} {n:>6} {n / sklearn_time:>8.0f}/s {n / compiled_time:>10.0f}/s {sklearn_time / compiled_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# compares cold start of the pickle + csv loader with the memory mapped bundle loader
+# each loader runs in a fresh interpreter so imports and page cache effects are counted the same way
+# run from the repo root: python -m benchmarks.bench_load
+import argparse
+import json
+import subprocess
+import sys
+
+CHILD = """
+import json, resource, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+from predictor import LolPredictor
+predictor = LolPredictor(bundle_path={bundle_path!r})
+init_time = time.perf_counter() - start
+init_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+teams = predictor.get_teams()
+roster = predictor.get_team_players(teams[0])
+start = time.perf_counter()
+from benchmarks.common import make_match_infos
+predictor.predict_voting(make_match_infos(predictor, 1)[0])
+first_predict_time = time.perf_counter() - start
+print(json.dumps({{"init": init_time, "init_rss_mb": init_rss / 1024, "first_predict": first_predict_time,
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def run_loader(bundle_path):
+    output = subprocess.run([sys.executable, "-c", CHILD.format(bundle_path=bundle_path)], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bundle", default="models/bundle")
+    args = parser.parse_args()
+
+    print(f"{'loader':>8} {'init (s)':>9} {'init RSS (MB)':>14} {'first predict (s)':>18} {'peak RSS (MB)':>14}")
+    for name, bundle_path in [("pickles", None), ("bundle", args.bundle)]:
+        runs = [run_loader(bundle_path) for _ in range(args.repeat)]
+        best = {key: min(run[key] for run in runs) for key in runs[0]}
+        print(f"{name:>8} {best['init']:>9.3f} {best['init_rss_mb']:>14.1f} {best['first_predict']:>18.3f} {best['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
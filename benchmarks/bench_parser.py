@@ -0,0 +1,43 @@
+# compares the BeautifulSoup and streaming parsers on the saved game pages in data/fixtures
+# tests/test_parser.py checks that both give the same team stats and rows
+# run from the repo root: python -m benchmarks.bench_parser
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+from benchmarks.common import best_of  # noqa: E402
+from fixture_server import FIXTURES_PATH  # noqa: E402
+from scraper import parse_game  # noqa: E402
+
+
+def load_games():
+    games = []
+    for game_path in sorted(glob.glob(os.path.join(FIXTURES_PATH, "game", "stats", "*"))):
+        with open(os.path.join(game_path, "page-game", "index.html"), encoding="utf-8") as f:
+            game_html = f.read()
+        with open(os.path.join(game_path, "page-fullstats", "index.html"), encoding="utf-8") as f:
+            fullstats_html = f.read()
+        games.append((int(os.path.basename(game_path)), game_html, fullstats_html))
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50, help="times every fixture is parsed per timing")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    games = load_games()
+    parses = args.rounds * len(games)
+    print(f"{'parser':>7} {'time (s)':>9} {'games/s':>8} {'speedup':>8}")
+    times = {}
+    for name in ["soup", "fast"]:
+        times[name], _ = best_of(lambda: [parse_game(g, f, game_id, name) for _ in range(args.rounds) for game_id, g, f in games], args.repeat)
+        print(f"{name:>7} {times[name]:>9.3f} {parses / times[name]:>8.1f} {times['soup'] / times[name]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# compares a loop of predict_voting/predict_elastic with the batched predict_*_many calls
+# run from the repo root: python -m benchmarks.bench_predict
+import argparse
+import warnings
+
+import numpy as np
+
+from benchmarks.common import best_of, make_match_infos
+from predictor import LolPredictor
+
+
+def run_loop(predictor, match_infos):
+    return [(predictor.predict_voting(m), predictor.predict_elastic(m)) for m in match_infos]
+
+
+def run_batched(predictor, match_infos):
+    return list(zip(predictor.predict_voting_many(match_infos), predictor.predict_elastic_many(match_infos)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    predictor = LolPredictor()
+
+    print(f"{'N':>7} {'loop (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for n in args.sizes:
+        match_infos = make_match_infos(predictor, n)
+
+        # the loop is slow at large N so only time it once there
+        loop_time, loop_results = best_of(lambda: run_loop(predictor, match_infos), 1 if n > 1000 else args.repeat)
+        batched_time, batched_results = best_of(lambda: run_batched(predictor, match_infos), args.repeat)
+
+        # batched results must match the per match results
+        loop_probs = np.array([[v["blue_win_probability"], e["blue_win_probability"]] for v, e in loop_results])
+        batched_probs = np.array([[v["blue_win_probability"], e["blue_win_probability"]] for v, e in batched_results])
+        np.testing.assert_allclose(batched_probs, loop_probs, rtol=0, atol=1e-12)
+
+        print(f"{n:>7} {loop_time:>10.4f} {batched_time:>12.4f} {loop_time / batched_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
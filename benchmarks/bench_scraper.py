@@ -0,0 +1,67 @@
+# measures offline scraping throughput against the fixture server with simulated network latency
+# compares the sequential StatsScraper.scrape_game loop with ConcurrentScraper at a few worker counts
+# run from the repo root: python -m benchmarks.bench_scraper
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+from concurrent_scraper import ConcurrentScraper, make_session  # noqa: E402
+from fixture_server import serve_fixtures  # noqa: E402
+from match_store import MatchStore  # noqa: E402
+from scraper import StatsScraper  # noqa: E402
+
+FIRST_GAME_ID = 70000
+
+
+def new_scraper(directory, base_url, session=None):
+    return StatsScraper(MatchStore(os.path.join(directory, "match_stats.sqlite")), session=session, base_url=base_url)
+
+
+def run_sequential(base_url, game_ids):
+    with tempfile.TemporaryDirectory() as directory:
+        scraper = new_scraper(directory, base_url, session=make_session(1))
+        start = time.perf_counter()
+        for game_id in game_ids:
+            scraper.scrape_game(game_id)
+        return time.perf_counter() - start
+
+
+def run_concurrent(base_url, game_ids, workers, parse_workers):
+    with tempfile.TemporaryDirectory() as directory:
+        scraper = new_scraper(directory, base_url)
+        concurrent = ConcurrentScraper(scraper, max_workers=workers, rate=None, parse_workers=parse_workers)
+        start = time.perf_counter()
+        failed_ids = concurrent.scrape_games(game_ids)
+        elapsed = time.perf_counter() - start
+        assert not failed_ids, failed_ids
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds of simulated latency per request")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--parse-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures(delay=args.delay, recycle=True)
+    game_ids = list(range(FIRST_GAME_ID, FIRST_GAME_ID + args.games))
+    pages = 2 * len(game_ids)
+
+    print(f"{args.games} games, {args.delay * 1000:.0f}ms simulated latency per page")
+    print(f"{'mode':>22} {'time (s)':>9} {'pages/s':>8}")
+    elapsed = run_sequential(base_url, game_ids)
+    print(f"{'sequential':>22} {elapsed:>9.2f} {pages / elapsed:>8.1f}")
+    for workers in args.workers:
+        elapsed = run_concurrent(base_url, game_ids, workers, args.parse_workers)
+        print(f"{f'concurrent x{workers}':>22} {elapsed:>9.2f} {pages / elapsed:>8.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# load test for server.py on localhost: starts the server in a subprocess, once scoring every request on its own
+# (--max-batch-size 1) and once with micro batching, and sends the same random matchups from many keep alive
+# connections at once. prints client side throughput and latency next to the server's own /metrics
+# run from the repo root: python -m benchmarks.bench_server
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.common import make_match_infos
+from predictor import LolPredictor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# starts server.py on a free port and waits for it to print its url
+def start_server(max_batch_size, max_wait_ms):
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--port", "0", "--max-batch-size", str(max_batch_size), "--max-wait-ms", str(max_wait_ms)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving predictions at "):
+        process.kill()
+        raise RuntimeError(f"server didn't start: {line!r}")
+    host, port = line.split()[3][len("http://"):].split(":")
+    return process, host, int(port)
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+# each connection sends its share of the matchups one after another, returns per request latencies
+async def run_client(host, port, match_infos, connections):
+    async def connection(share):
+        reader, writer = await asyncio.open_connection(host, port)
+        latencies = []
+        for match_info in share:
+            start = time.perf_counter()
+            status, result = await request(reader, writer, "POST", "/predict", match_info)
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, result
+        writer.close()
+        return latencies
+
+    start = time.perf_counter()
+    shares = await asyncio.gather(*[connection(match_infos[i::connections]) for i in range(connections)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, metrics = await request(reader, writer, "GET", "/metrics")
+    writer.close()
+    return elapsed, np.concatenate(shares), metrics
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    match_infos = make_match_infos(LolPredictor(), args.requests)
+
+    print(f"{args.requests} requests over {args.connections} connections, {os.cpu_count()} cores")
+    print(f"{'mode':>10} {'req/s':>8} {'p50':>9} {'p99':>9} {'server p50':>11} {'server p99':>11} {'mean batch':>11}")
+    throughputs = {}
+    for mode, max_batch_size in [("unbatched", 1), ("batched", args.max_batch_size)]:
+        process, host, port = start_server(max_batch_size, args.max_wait_ms)
+        try:
+            elapsed, latencies, metrics = asyncio.run(run_client(host, port, match_infos, args.connections))
+        finally:
+            process.terminate()
+            process.wait()
+        throughputs[mode] = args.requests / elapsed
+        print(
+            f"{mode:>10} {throughputs[mode]:>8.0f} {np.percentile(latencies, 50) * 1000:>7.1f}ms {np.percentile(latencies, 99) * 1000:>7.1f}ms "
+            f"{metrics['latency_ms']['p50']:>9.1f}ms {metrics['latency_ms']['p99']:>9.1f}ms {metrics['mean_batch_size']:>11.1f}"
+        )
+    print(f"micro batching: {throughputs['batched'] / throughputs['unbatched']:.1f}x throughput")
+
+
+if __name__ == "__main__":
+    main()
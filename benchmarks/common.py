@@ -0,0 +1,43 @@
+import random
+import time
+
+from predictor import ROLES
+
+
+# builds n random but valid matchups from the shipped encoders and rosters
+def make_match_infos(predictor, n, seed=0):
+    rng = random.Random(seed)
+    teams = predictor.get_teams()
+    regions = predictor.get_regions()
+    patches = predictor.get_patches()
+    rosters = {team: predictor.get_team_players(team) for team in teams}
+    champions = {role: predictor.get_champions(role) for role in ROLES}
+
+    match_infos = []
+    for _ in range(n):
+        blue_team, red_team = rng.sample(teams, 2)
+        sides = {}
+        for side, team in [("blue", blue_team), ("red", red_team)]:
+            sides[side] = {
+                "team_name": team,
+                "players": {role: rng.choice(rosters[team][role]) for role in ROLES},
+                "champions": {role: rng.choice(champions[role]) for role in ROLES},
+            }
+        match_infos.append(predictor.create_match_info(rng.choice(patches), rng.choice(regions), sides["blue"], sides["red"]))
+    return match_infos
+
+
+# runs func once and returns the wall clock time in seconds with its result
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+# runs func repeat times and returns the best wall clock time in seconds with the last result
+def best_of(func, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        elapsed, result = timed(func)
+        best = min(best, elapsed)
+    return best, result
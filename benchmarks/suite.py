@@ -0,0 +1,258 @@
+# benchmark suite with fixed inputs: the shipped models and csvs, seeded random matchups and the saved gol.gg pages
+# every case is timed in rounds long enough to measure (like timeit.autorange), results are written as json and
+# can be compared with an earlier run, exiting with 1 when a case got slower than the threshold allows
+# run from the repo root:
+#   python -m benchmarks.suite --output benchmark_results/baseline.json
+#   python -m benchmarks.suite --baseline benchmark_results/baseline.json --threshold 0.2
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.common import make_match_infos  # noqa: E402
+from elo import EloRatings  # noqa: E402
+from features import HISTORY_PATH, PROCESSED_PATH, ROLES, Encoders, FeaturePipeline  # noqa: E402
+from fixture_server import FIXTURES_PATH  # noqa: E402
+from match_store import MatchStore  # noqa: E402
+from predictor import LolPredictor  # noqa: E402
+from scraper import StatsScraper, parse_game  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED = 2025
+BATCH_SIZE = 1000
+# a round of a case runs for at least this long
+MIN_ROUND_SECONDS = 0.2
+# a cold start as the app sees it, in a fresh interpreter so the imports are paid again every call
+COLD_START = """
+import warnings
+warnings.filterwarnings("ignore")
+from predictor import LolPredictor
+LolPredictor(bundle_path={bundle_path!r}).get_teams()
+"""
+
+
+class FixtureResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# serves the saved pages from memory by url path so scraping is timed without any network
+class FixtureSession:
+    def __init__(self, directory=FIXTURES_PATH):
+        self.pages = {}
+        for path in glob.glob(os.path.join(directory, "game", "stats", "*", "*", "index.html")):
+            with open(path, encoding="utf-8") as f:
+                self.pages["/" + os.path.relpath(os.path.dirname(path), directory).replace(os.sep, "/") + "/"] = f.read()
+
+    def get(self, url, headers=None, **kwargs):
+        return FixtureResponse(self.pages[url[url.index("/game/"):]])
+
+
+# every case is name -> setup, setup builds the fixed inputs and returns the function to time and how many items one call handles
+def build_cases(directory):
+    cases = {}
+
+    def case(setup):
+        cases[setup.__name__] = setup
+        return setup
+
+    # loaders are shared by the cases that only need a loaded predictor
+    state = {}
+
+    def predictor():
+        if "predictor" not in state:
+            state["predictor"] = LolPredictor()
+            for name in ("voting", "elastic"):
+                state["predictor"].get_model(name)
+            state["match_infos"] = make_match_infos(state["predictor"], BATCH_SIZE, seed=SEED)
+        return state["predictor"], state["match_infos"]
+
+    # includes the interpreter's own startup, which is the same for every commit
+    def cold_start(bundle_path):
+        return lambda: subprocess.run([sys.executable, "-c", COLD_START.format(bundle_path=bundle_path)], cwd=ROOT, check=True), 1
+
+    @case
+    def load_bundle():
+        return cold_start("models/bundle")
+
+    @case
+    def load_pickles():
+        return cold_start(None)
+
+    @case
+    def predict_voting():
+        model, match_infos = predictor()
+        return lambda: model.predict_voting(match_infos[0]), 1
+
+    @case
+    def predict_elastic():
+        model, match_infos = predictor()
+        return lambda: model.predict_elastic(match_infos[0]), 1
+
+    @case
+    def predict_voting_many():
+        model, match_infos = predictor()
+        return lambda: model.predict_voting_many(match_infos), len(match_infos)
+
+    @case
+    def predict_elastic_many():
+        model, match_infos = predictor()
+        return lambda: model.predict_elastic_many(match_infos), len(match_infos)
+
+    @case
+    def get_team_players():
+        model, _ = predictor()
+        teams = model.get_teams()
+        return lambda: [model.get_team_players(team) for team in teams], len(teams)
+
+    @case
+    def get_player_historical_stats():
+        model, match_infos = predictor()
+        lookups = [(match_info["blue_team"]["players"][role], role) for match_info in match_infos[:100] for role in ROLES]
+        items = len(lookups)
+        return lambda: [model.get_player_historical_stats(player, role) for player, role in lookups], items
+
+    @case
+    def parse_game_fast():
+        session = FixtureSession()
+        games = [(int(url.split("/")[3]), session.pages[url], session.pages[url.replace("page-game", "page-fullstats")]) for url in session.pages if "page-game" in url]
+        items = len(games)
+        return lambda: [parse_game(game_html, fullstats_html, game_id) for game_id, game_html, fullstats_html in games], items
+
+    # fetch from memory, parse both pages and write the rows to a fresh sqlite store
+    @case
+    def scrape_game():
+        session = FixtureSession()
+        game_ids = sorted(int(url.split("/")[3]) for url in session.pages if "page-game" in url)
+        items = len(game_ids)
+        runs = iter(range(10 ** 9))
+
+        def run():
+            scraper = StatsScraper(MatchStore(os.path.join(directory, f"scrape_{next(runs)}.sqlite")), session=session, base_url="http://fixtures")
+            for game_id in game_ids:
+                scraper.scrape_game(game_id)
+            scraper.store.close()
+        return run, items
+
+    @case
+    def elo_replay():
+        processed = pd.read_csv(PROCESSED_PATH)
+        items = len(processed)
+        return lambda: EloRatings.from_processed(processed), items
+
+    @case
+    def feature_build():
+        team_rows = pd.read_csv(HISTORY_PATH, dtype={"Patch": str}, keep_default_na=False)
+        encoders = Encoders.from_pickles()
+        items = len(team_rows) // 2
+        return lambda: FeaturePipeline.build(team_rows, encoders), items
+
+    return cases
+
+
+# calls per round so one round takes at least min_seconds, then the seconds per call of every round
+def time_case(func, repeat, min_seconds=MIN_ROUND_SECONDS):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+        number = max(number * 2, int(number * min_seconds / max(elapsed, 1e-9) * 1.2))
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return number, rounds
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+# cases whose best round got slower than baseline by more than threshold (0.2 = 20%), cases missing on either side are skipped
+def compare(results, baseline, threshold):
+    rows = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["best_seconds"] / before["best_seconds"]
+        rows.append((name, before["best_seconds"], result["best_seconds"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="benchmark_results/latest.json")
+    parser.add_argument("--baseline", help="results json of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown over the baseline counted as a regression, 0.2 = 20%%")
+    parser.add_argument("--cases", nargs="+", help="only run these cases")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per case, the best one is compared")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    with tempfile.TemporaryDirectory() as directory:
+        cases = build_cases(directory)
+        names = args.cases or list(cases)
+        unknown = [name for name in names if name not in cases]
+        if unknown:
+            parser.error(f"unknown cases {unknown}, expected some of {list(cases)}")
+
+        results = {}
+        print(f"{'case':>28} {'best':>11} {'median':>11} {'per item':>11} {'calls':>6}")
+        for name in names:
+            func, items = cases[name]()
+            number, rounds = time_case(func, args.repeat)
+            best, median = min(rounds), float(np.median(rounds))
+            results[name] = {"best_seconds": best, "median_seconds": median, "rounds": rounds, "calls_per_round": number, "items_per_call": items}
+            print(f"{name:>28} {best * 1e3:>9.3f}ms {median * 1e3:>9.3f}ms {best / items * 1e6:>9.1f}us {number:>6}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nagainst {args.baseline} ({baseline['environment'].get('commit')}), threshold +{args.threshold:.0%}")
+        print(f"{'case':>28} {'baseline':>11} {'now':>11} {'change':>8}")
+        for name, before, now, ratio, regressed in rows:
+            print(f"{name:>28} {before * 1e3:>9.3f}ms {now * 1e3:>9.3f}ms {ratio - 1:>+7.1%}{'  REGRESSION' if regressed else ''}")
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# exports everything LolPredictor needs into one versioned directory of .npy arrays plus a json manifest
+# arrays are memory mapped on load and the models are copied in as pickles that are only loaded on first use
+# run from the repo root after retraining: python bundle.py
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+# bump when the layout of the bundle changes so old bundles are rejected instead of misread
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def bundle_exists(path):
+    return os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+# hash every file in the bundle so the version changes whenever any artifact does
+def _hash_files(path, file_names):
+    digest = hashlib.sha256()
+    for file_name in sorted(file_names):
+        digest.update(file_name.encode())
+        with open(os.path.join(path, file_name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# sha256 of each source file, recorded at export so a bundle older than its sources can be told apart
+def hash_sources(paths):
+    hashes = {}
+    for source in paths:
+        with open(source, "rb") as f:
+            hashes[source] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+# sources that changed since the bundle was exported. sources that aren't there, like a bundle shipped on its own, are skipped
+def changed_sources(path):
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        recorded = json.load(f).get("sources", {})
+    current = hash_sources([source for source in recorded if os.path.exists(source)])
+    return [source for source, digest in current.items() if digest != recorded[source]]
+
+
+def _save_array(path, file_name, array):
+    np.save(os.path.join(path, file_name), array, allow_pickle=False)
+    return file_name
+
+
+# writes the bundle from a predictor that was loaded from the pickles and csv
+def export_bundle(predictor, path="models/bundle"):
+    from predictor import GAME_COLUMNS, ROLES, SOURCE_PATHS
+
+    # write into a temporary directory first so a failed export never leaves a half written bundle
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    files = []
+
+    # label encoder classes as fixed width strings so they can be memory mapped
+    files.append(_save_array(tmp_path, "team_classes.npy", predictor.label_classes["team"].astype(str)))
+    for column, classes in predictor.label_classes["player"].items():
+        files.append(_save_array(tmp_path, f"{column}_classes.npy", classes.astype(str)))
+    for column, classes in predictor.label_classes["champion"].items():
+        files.append(_save_array(tmp_path, f"{column}_classes.npy", classes.astype(str)))
+
+    # elo as a vector indexed by encoded team
+    team_count = len(predictor.label_classes["team"])
+    team_elos = np.array([predictor.final_team_elos[team] for team in range(team_count)], dtype=np.float64)
+    files.append(_save_array(tmp_path, "team_elos.npy", team_elos))
+
+    # precomputed player stat tables
+    for role in ROLES:
+        for table in ["counts", "sums", "means", "fallback"]:
+            files.append(_save_array(tmp_path, f"{role}_player_{table}.npy", predictor.player_stats[role][table]))
+
+    # the game columns used for roster lookups as one structured array
+    games = {column: np.asarray(predictor.games[column]) for column in GAME_COLUMNS}
+    games_dtype = [(column, values.astype(str).dtype if values.dtype == object else values.dtype) for column, values in games.items()]
+    games_table = np.empty(len(games["GameID"]), dtype=games_dtype)
+    for column, values in games.items():
+        games_table[column] = values
+    files.append(_save_array(tmp_path, "games.npy", games_table))
+
+    model_files = {}
+    for name, model_path in predictor.model_paths.items():
+        model_files[name] = os.path.basename(model_path)
+        shutil.copyfile(model_path, os.path.join(tmp_path, model_files[name]))
+        files.append(model_files[name])
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": _hash_files(tmp_path, files),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "feature_columns": list(predictor.feature_columns),
+        "one_hot_features": predictor.one_hot_features,
+        "player_columns": list(predictor.label_classes["player"]),
+        "champion_columns": list(predictor.label_classes["champion"]),
+        "models": model_files,
+        "files": sorted(files),
+        "sources": hash_sources(SOURCE_PATHS)
+    }
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+# loads the bundle arrays memory mapped, models are returned as paths for lazy loading
+def load_bundle(path="models/bundle", mmap_mode="r"):
+    from predictor import ROLES
+
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Bundle at {path} has format {manifest.get('format')}, expected {BUNDLE_FORMAT}. Re-export it with python bundle.py")
+
+    def load(file_name):
+        return np.load(os.path.join(path, file_name), mmap_mode=mmap_mode, allow_pickle=False)
+
+    return {
+        "version": manifest["version"],
+        "feature_columns": manifest["feature_columns"],
+        "one_hot_features": manifest["one_hot_features"],
+        "model_paths": {name: os.path.join(path, file_name) for name, file_name in manifest["models"].items()},
+        "label_classes": {
+            "team": load("team_classes.npy"),
+            "player": {column: load(f"{column}_classes.npy") for column in manifest["player_columns"]},
+            "champion": {column: load(f"{column}_classes.npy") for column in manifest["champion_columns"]}
+        },
+        "team_elos": load("team_elos.npy"),
+        "player_stats": {
+            role: {table: load(f"{role}_player_{table}.npy") for table in ["counts", "sums", "means", "fallback"]}
+            for role in ROLES
+        },
+        "games": load("games.npy")
+    }
+
+
+if __name__ == "__main__":
+    from predictor import LolPredictor
+
+    manifest = export_bundle(LolPredictor(bundle_path=None))
+    print(f"Exported bundle version {manifest['version']} with {len(manifest['files'])} files")
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# hashes everything the encoders see, lowercased the way they expect, plus the model and artifact version
+def match_cache_key(match_info, model_name, artifact_version):
+    canonical = {
+        "patch": str(match_info["patch"]),
+        "region": match_info["region"].lower(),
+        "model": model_name,
+        "version": artifact_version
+    }
+    for team_color in ["blue", "red"]:
+        team_data = match_info[f"{team_color}_team"]
+        canonical[team_color] = {
+            "team": team_data["team_name"].lower(),
+            "players": {role: player.lower() for role, player in team_data["players"].items()},
+            "champions": {role: champion.lower() for role, champion in team_data["champions"].items()}
+        }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SqliteCacheBackend:
+    # stores results on disk so the cache survives restarts
+    def __init__(self, path="prediction_cache.sqlite"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+        self.connection.commit()
+
+    # returns (value, created) or None
+    def get(self, key):
+        row = self.connection.execute("SELECT value, created FROM predictions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, created):
+        self.connection.execute("INSERT OR REPLACE INTO predictions (key, value, created) VALUES (?, ?, ?)", (key, json.dumps(value), created))
+        self.connection.commit()
+
+    def delete(self, key):
+        self.connection.execute("DELETE FROM predictions WHERE key = ?", (key,))
+        self.connection.commit()
+
+    def clear(self):
+        self.connection.execute("DELETE FROM predictions")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class PredictionCache:
+    # bounded lru cache of prediction results with an optional ttl in seconds and an optional disk backend
+    def __init__(self, maxsize=1024, ttl=None, backend=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def expired(self, created):
+        return self.ttl is not None and self.clock() - created > self.ttl
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.expired(entry[1]):
+                del self.entries[key]
+                entry = None
+
+            # fall back to disk and promote the result into memory
+            if entry is None and self.backend is not None:
+                entry = self.backend.get(key)
+                if entry is not None and self.expired(entry[1]):
+                    self.backend.delete(key)
+                    entry = None
+                if entry is not None:
+                    self.store(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            # copies so callers can't change the cached result
+            return dict(entry[0])
+
+    def set(self, key, value):
+        # plain floats so results are the same whether they come from memory or disk
+        value = {name: float(item) if hasattr(item, "dtype") else item for name, item in value.items()}
+        created = self.clock()
+        with self.lock:
+            self.store(key, (value, created))
+            if self.backend is not None:
+                self.backend.set(key, value, created)
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.backend is not None:
+                self.backend.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "maxsize": self.maxsize
+            }
@@ -0,0 +1,183 @@
+# concurrent version of the scraping loop in scraper.py
+# pages are fetched by a thread pool over one pooled session, every request waits on a shared token bucket
+# so gol.gg never sees more than `rate` requests per second, and html is parsed in worker processes
+import argparse
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from http_cache import DEFAULT_CACHE_DIR, CachedSession
+from scraper import BASE_URL, DEFAULT_PARSER, DISCOVERY_MODES, HEADERS, PARSERS, StatsScraper, get_matchlist_links, make_cached_session, parse_game, parse_games_links, parse_series_game_ids, summary_url
+
+
+class TokenBucket:
+    # allows `rate` acquisitions per second on average with bursts of up to `burst`, rate None disables limiting
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate is None:
+            return
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # take the token now, even if it goes negative, so waiting threads are served in order
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_time > 0:
+            self.sleep(wait_time)
+
+
+# one session shared by every fetch thread, with a connection pool per thread and retries on server errors
+def make_session(pool_size=4, retries=3):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ConcurrentScraper:
+    def __init__(self, scraper: StatsScraper, max_workers=4, rate=1.0, burst=2, parse_workers=1, session=None, timeout=30):
+        self.scraper = scraper
+        self.max_workers = max_workers
+        self.parse_workers = parse_workers
+        self.timeout = timeout
+        self.session = session if session is not None else make_session(max_workers)
+        self.bucket = TokenBucket(rate, burst)
+        # a cached session only waits on the bucket for requests that reach gol.gg, cache hits are free
+        if isinstance(self.session, CachedSession):
+            self.session.throttle = self.bucket.acquire
+
+    def fetch(self, link: str) -> str:
+        if not isinstance(self.session, CachedSession):
+            self.bucket.acquire()
+        with self.scraper.span("scraper.fetch", url = link):
+            response = self.session.get(link, timeout = self.timeout)
+            response.raise_for_status()
+        self.scraper.count("scraper.fetched_bytes", len(response.text))
+        return response.text
+
+    def fetch_game(self, game_id: int) -> tuple[str, str]:
+        base_url = self.scraper.base_url
+        game_html = self.fetch(f"{base_url}/game/stats/{game_id}/page-game/")
+        fullstats_html = self.fetch(f"{base_url}/game/stats/{game_id}/page-fullstats/")
+        return game_html, fullstats_html
+
+    # parse_workers 0 parses in this thread, otherwise in a process pool so parsing never blocks the fetch threads
+    def make_parse_pool(self):
+        if self.parse_workers:
+            return ProcessPoolExecutor(self.parse_workers)
+        return None
+
+    # scrapes every game that isn't scraped yet as one store run, returns the ids that failed
+    def scrape_games(self, game_ids: list[int]) -> list[int]:
+        pending_ids = [game_id for game_id in dict.fromkeys(game_ids) if game_id not in self.scraper.scraped_game_ids]
+        failed_ids = []
+        parse_pool = self.make_parse_pool()
+        parse_futures = {}
+
+        # results are recorded on this thread only so StatsScraper's state is never shared
+        def record(game_id, rows):
+            if rows is None:
+                failed_ids.append(game_id)
+                return
+            self.scraper.record_game(game_id, rows)
+
+        def collect(futures):
+            for future in futures:
+                game_id = parse_futures.pop(future)
+                try:
+                    record(game_id, future.result())
+                except Exception as e:
+                    print(f"Failed to parse game {game_id}: {e}")
+                    failed_ids.append(game_id)
+
+        self.scraper.store.start_run()
+        try:
+            with ThreadPoolExecutor(self.max_workers) as fetch_pool:
+                fetch_futures = {fetch_pool.submit(self.fetch_game, game_id): game_id for game_id in pending_ids}
+                for future in as_completed(fetch_futures):
+                    game_id = fetch_futures[future]
+                    try:
+                        game_html, fullstats_html = future.result()
+                    except requests.RequestException as e:
+                        print(f"Failed to fetch game {game_id}: {e}")
+                        failed_ids.append(game_id)
+                        continue
+
+                    if parse_pool is None:
+                        with self.scraper.span("scraper.parse_game"):
+                            rows = parse_game(game_html, fullstats_html, game_id, self.scraper.parser)
+                        record(game_id, rows)
+                    else:
+                        parse_futures[parse_pool.submit(parse_game, game_html, fullstats_html, game_id, self.scraper.parser)] = game_id
+                        # record whatever has finished parsing without waiting on the rest
+                        done, _ = wait(list(parse_futures), timeout=0, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+            collect(as_completed(list(parse_futures)))
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+        return failed_ids
+
+    # concurrent version of scraper.get_game_id
+    def fetch_game_ids(self, links: list[str]) -> list[int]:
+        def series_ids(link):
+            # get the game id from the link using regex
+            match = re.search(r"/game/stats/(\d+)", link)
+            if not match:
+                return []
+            html = self.fetch(summary_url(link, self.scraper.base_url))
+            return parse_series_game_ids(html, int(match.group(1)))
+
+        game_ids = []
+        with ThreadPoolExecutor(self.max_workers) as fetch_pool:
+            for ids in fetch_pool.map(series_ids, links):
+                game_ids.extend(ids)
+        return sorted(game_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="concurrent page fetches")
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second to gol.gg")
+    parser.add_argument("--parse-workers", type=int, default=1, help="parser processes, 0 parses in the main thread")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER, help="html parser backend")
+    parser.add_argument("--base-url", default=BASE_URL, help="point at a fixture server for offline runs")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="on disk cache of fetched pages")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch pages from gol.gg")
+    parser.add_argument("--offline", action="store_true", help="only replay pages that are already cached")
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default="auto", help="how the tournament list is fetched")
+    parser.add_argument("--tournament", help="matchlist url to scrape instead of the latest major tournament")
+    args = parser.parse_args()
+
+    session = make_session(args.workers)
+    if not args.no_cache:
+        session = make_cached_session(session, args.cache_dir, args.offline)
+    scraper = StatsScraper(session=session, base_url=args.base_url, parser=args.parser)
+    concurrent = ConcurrentScraper(scraper, max_workers=args.workers, rate=args.rate, parse_workers=args.parse_workers, session=session)
+    link = args.tournament or get_matchlist_links(session, args.discovery, args.base_url)[0]
+    ids = concurrent.fetch_game_ids(parse_games_links(concurrent.fetch(link)))
+    failed_ids = concurrent.scrape_games(ids)
+    if failed_ids:
+        print(f"Failed games (rerun to retry): {failed_ids}")
+
+
+if __name__ == "__main__":
+    main()
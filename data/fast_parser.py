@@ -0,0 +1,256 @@
+# streaming extractor for the two gol.gg game pages, an alternative to building a BeautifulSoup tree
+# it tokenizes with the standard library html.parser and only keeps text for the header divs and the first
+# table, stopping as soon as those are closed. tags are nested and closed the way BeautifulSoup's html.parser
+# builder does it, so the text it returns is the same as get_text on the soup
+from html.parser import HTMLParser
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+# tags the soup never expects a closing tag for
+VOID_TAGS = HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS
+# text inside these (script, style, template...) is not returned by get_text
+HIDDEN_TAGS = set(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+
+
+class _Done(Exception):
+    pass
+
+
+class _Collector:
+    # gathers the strings under one element the way get_text sees them
+    def __init__(self):
+        self.strings = []
+
+    def text(self):
+        return "".join(self.strings)
+
+    def stripped_text(self):
+        return "".join(string.strip() for string in self.strings if string.strip())
+
+
+class _StreamParser(HTMLParser):
+    def __init__(self):
+        # character references are decoded below exactly like BeautifulSoup's html.parser builder
+        super().__init__(convert_charrefs=False)
+        # open elements as [tag, collectors closed with it]
+        self.stack = []
+        self.open_collectors = []
+        self.pending = []
+        self.hidden = 0
+
+    def run(self, html):
+        try:
+            self.feed(html)
+            self.close()
+        except _Done:
+            pass
+        return self
+
+    # contiguous text is one string in the soup, so text is joined until the next tag or comment
+    def flush(self):
+        if self.pending:
+            string = "".join(self.pending)
+            self.pending = []
+            if not self.hidden:
+                for collector in self.open_collectors:
+                    collector.strings.append(string)
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def handle_charref(self, name):
+        code = int(name.lstrip("xX"), 16) if name[0] in "xX" else int(name)
+        data = None
+        # references below 256 are usually windows-1252 on real pages
+        if code < 256:
+            try:
+                data = bytes([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_comment(self, data):
+        self.flush()
+
+    # cdata is its own string in the soup and get_text includes it
+    def unknown_decl(self, data):
+        self.flush()
+        if data.upper().startswith("CDATA["):
+            self.pending.append(data[len("CDATA["):])
+            self.flush()
+
+    def handle_decl(self, decl):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in VOID_TAGS:
+            self.start_void(tag, dict(attrs))
+            return
+        collectors = self.start_element(tag, dict(attrs))
+        self.stack.append([tag, collectors])
+        self.open_collectors.extend(collectors)
+        if tag in HIDDEN_TAGS:
+            self.hidden += 1
+
+    def handle_endtag(self, tag):
+        self.flush()
+        # like the soup, an end tag closes everything opened after the matching start tag and unmatched ones are ignored
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position][0] == tag:
+                break
+        else:
+            return
+        while len(self.stack) > position:
+            closed_tag, collectors = self.stack.pop()
+            if closed_tag in HIDDEN_TAGS:
+                self.hidden -= 1
+            for collector in collectors:
+                self.open_collectors.remove(collector)
+            self.end_element(closed_tag)
+
+    def close(self):
+        super().close()
+        self.flush()
+
+    # subclasses return the collectors to open with the element
+    def start_element(self, tag, attrs):
+        return []
+
+    def start_void(self, tag, attrs):
+        pass
+
+    def end_element(self, tag):
+        pass
+
+
+class _HeaderParser(_StreamParser):
+    # text, stripped text and the first <a> and <h1> text of the first div with each class
+    def __init__(self, classes):
+        super().__init__()
+        self.classes = set(classes)
+        self.found = {}
+        self.open_divs = []
+        self.remaining = len(self.classes)
+
+    def start_element(self, tag, attrs):
+        collectors = []
+        if tag == "div":
+            # class_ matches the whole attribute with whitespace collapsed
+            class_name = " ".join((attrs.get("class") or "").split())
+            if class_name in self.classes and class_name not in self.found:
+                div = {"div": _Collector(), "a": None, "h1": None, "depth": len(self.stack)}
+                self.found[class_name] = div
+                self.open_divs.append(div)
+                collectors.append(div["div"])
+        elif tag in ("a", "h1"):
+            for div in self.open_divs:
+                if div[tag] is None:
+                    div[tag] = _Collector()
+                    collectors.append(div[tag])
+        return collectors
+
+    def end_element(self, tag):
+        if tag != "div":
+            return
+        depth = len(self.stack)
+        for div in [div for div in self.open_divs if div["depth"] == depth]:
+            self.open_divs.remove(div)
+            self.remaining -= 1
+        if not self.remaining:
+            raise _Done
+
+
+class _TableParser(_StreamParser):
+    # champion icons of the first <thead> and the stripped text of every cell of every row in the first <table>
+    def __init__(self):
+        super().__init__()
+        self.table_depth = None
+        self.thead_depth = None
+        self.thead_seen = False
+        self.open_headers = []
+        self.header_alts = []
+        self.open_rows = []
+        self.rows = []
+
+    def start_element(self, tag, attrs):
+        if self.table_depth is None:
+            if tag == "table":
+                self.table_depth = len(self.stack)
+            return []
+        if tag == "thead" and not self.thead_seen:
+            self.thead_seen = True
+            self.thead_depth = len(self.stack)
+        elif tag == "th" and self.thead_depth is not None:
+            # only the first image in a header cell is looked at
+            header = {"img": False, "depth": len(self.stack)}
+            self.open_headers.append(header)
+            self.header_alts.append(header)
+        elif tag == "tr":
+            row = {"cells": [], "depth": len(self.stack)}
+            self.rows.append(row["cells"])
+            self.open_rows.append(row)
+        elif tag == "td":
+            # a cell belongs to every row it is nested in
+            cell = _Collector()
+            for row in self.open_rows:
+                row["cells"].append(cell)
+            return [cell]
+        return []
+
+    def start_void(self, tag, attrs):
+        if tag == "img":
+            for header in self.open_headers:
+                if not header["img"]:
+                    header["img"] = True
+                    header["alt"] = attrs.get("alt", False)
+
+    def end_element(self, tag):
+        depth = len(self.stack)
+        if tag == "table" and depth == self.table_depth:
+            raise _Done
+        if tag == "thead" and depth == self.thead_depth:
+            self.thead_depth = None
+            self.open_headers = []
+        elif tag == "th":
+            self.open_headers = [header for header in self.open_headers if header["depth"] != depth]
+        elif tag == "tr":
+            self.open_rows = [row for row in self.open_rows if row["depth"] != depth]
+
+
+# {class: {"text", "stripped", "a", "h1"}} for the first div with each class, a and h1 are None when the div has none
+def extract_header(html: str, classes) -> dict:
+    parser = _HeaderParser(classes).run(html)
+    return {
+        class_name: {
+            "text": div["div"].text(),
+            "stripped": div["div"].stripped_text(),
+            "a": None if div["a"] is None else div["a"].stripped_text(),
+            "h1": None if div["h1"] is None else div["h1"].stripped_text()
+        }
+        for class_name, div in parser.found.items()
+    }
+
+
+# (alt text of the champion icons after the first header cell, cell text of every row after the first), None if there is no table
+def extract_table(html: str) -> tuple[list[str], list[list[str]]] | None:
+    parser = _TableParser().run(html)
+    if parser.table_depth is None:
+        return None
+    # an alt attribute without a value is an empty string in the soup
+    alts = [header["alt"] or "" for header in parser.header_alts[1:] if header["img"] and header["alt"] is not False]
+    rows = [[cell.stripped_text() for cell in cells] for cells in parser.rows[1:]]
+    return alts, rows
@@ -0,0 +1,86 @@
+# serves saved gol.gg pages from data/fixtures so the scrapers can run offline
+# urls keep the gol.gg layout, e.g. /game/stats/62896/page-game/ is fixtures/game/stats/62896/page-game/index.html
+# run from the data folder: python fixture_server.py --port 8000
+import argparse
+import functools
+import os
+import re
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# the guessed "top leagues" form from TOP_LEAGUES_FORM, the saved list pages are reconstructed around it
+# rather than recorded from gol.gg, so they only check the scraper against the guess
+FILTER_FORM = {"leagues_top": ["on"]}
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, delay=0.0, recycle_games=None, **kwargs):
+        self.delay = delay
+        self.recycle_games = recycle_games
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        # simulated network latency per request
+        if self.delay:
+            time.sleep(self.delay)
+        # any game id can be served from one of the saved games so benchmarks can ask for many ids
+        match = re.match(r"^/game/stats/(\d+)/(page-[a-z]+)/$", self.path)
+        if self.recycle_games and match and int(match.group(1)) not in self.recycle_games:
+            source_id = self.recycle_games[int(match.group(1)) % len(self.recycle_games)]
+            self.path = f"/game/stats/{source_id}/{match.group(2)}/"
+        super().do_GET()
+
+    # the list pages are fetched by posting their filter form. the saved pages are already filtered, so they are only
+    # served for that form and with the checkbox ticked, the way a page with the filter applied comes back
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        if self.delay:
+            time.sleep(self.delay)
+        if any(form.get(name) != value for name, value in FILTER_FORM.items()):
+            self.send_error(400, f"Expected the filter form {FILTER_FORM}, got {form}")
+            return
+        path = os.path.join(self.translate_path(self.path), "index.html")
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            page = f.read()
+        for name in FILTER_FORM:
+            page = page.replace(f'name="{name}"'.encode(), f'name="{name}" checked'.encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# starts the server in a daemon thread, port 0 picks a free port, returns the server and its base url
+def serve_fixtures(directory=FIXTURES_PATH, port=0, delay=0.0, recycle=False):
+    recycle_games = None
+    if recycle:
+        recycle_games = sorted(int(game_id) for game_id in os.listdir(os.path.join(directory, "game", "stats")))
+    handler = functools.partial(FixtureHandler, directory=directory, delay=delay, recycle_games=recycle_games)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds of simulated latency per request")
+    parser.add_argument("--recycle", action="store_true", help="serve any game id from the saved games")
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures(port=args.port, delay=args.delay, recycle=args.recycle)
+    print(f"Serving {FIXTURES_PATH} at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,166 @@
+# on disk http cache shared by the scrapers, drop in for a requests session: CachedSession().get(url).text
+# bodies are stored once per content hash under objects/, an sqlite index maps each url to its body, validators
+# and expiry. stale pages are revalidated with If-None-Match/If-Modified-Since so unchanged pages cost a 304,
+# and offline=True replays only what is cached, which makes the cache usable as a fixture source
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = "http_cache"
+DEFAULT_MAX_AGE = 3600
+
+
+class CacheMiss(requests.ConnectionError):
+    # raised in offline mode for urls that were never cached, a ConnectionError so callers handle it like a failed fetch
+    pass
+
+
+class CachedSession:
+    # rules are (url regex, max_age) checked in order, max_age is seconds, None for never refetch,
+    # or a function of the page text returning either. throttle is called before every real request
+    def __init__(self, session=None, cache_dir=DEFAULT_CACHE_DIR, rules=(), default_max_age=DEFAULT_MAX_AGE, offline=False, throttle=None, clock=time.time):
+        self.session = session if session is not None else requests.Session()
+        self.cache_dir = cache_dir
+        self.rules = [(re.compile(pattern), max_age) for pattern, max_age in rules]
+        self.default_max_age = default_max_age
+        self.offline = offline
+        self.throttle = throttle
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "revalidated": 0, "downloaded": 0, "stale_served": 0}
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "encoding TEXT, content_type TEXT, fetched REAL NOT NULL, expires REAL)"
+            )
+
+    # seconds the page stays fresh, None when it never goes stale
+    def max_age(self, url, entry):
+        for pattern, max_age in self.rules:
+            if pattern.search(url):
+                return max_age(self.decode(entry).text) if callable(max_age) else max_age
+        return self.default_max_age
+
+    def object_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT digest, etag, last_modified, encoding, content_type, fetched, expires FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(["digest", "etag", "last_modified", "encoding", "content_type", "fetched", "expires"], row))
+        path = self.object_path(entry["digest"])
+        # an index row whose body is missing is treated as not cached
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            entry["content"] = f.read()
+        return entry
+
+    def store(self, url, content, etag, last_modified, encoding, content_type):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            # written to a temporary file first so a crash never leaves a truncated body behind
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        entry = {"digest": digest, "etag": etag, "last_modified": last_modified, "encoding": encoding, "content_type": content_type, "content": content}
+        self.touch(url, entry)
+        return entry
+
+    # records a fresh fetch or revalidation of the entry and works out when it expires
+    def touch(self, url, entry):
+        now = self.clock()
+        max_age = self.max_age(url, entry)
+        entry["fetched"] = now
+        entry["expires"] = None if max_age is None else now + max_age
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (url, digest, etag, last_modified, encoding, content_type, fetched, expires) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, entry["digest"], entry["etag"], entry["last_modified"], entry["encoding"], entry["content_type"], now, entry["expires"])
+            )
+
+    # a requests.Response built from the cached body, so .text decodes exactly like the original response
+    def decode(self, entry, url=None):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = entry["content"]
+        response.encoding = entry["encoding"]
+        response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"]} if entry["content_type"] else {})
+        return response
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def is_fresh(self, entry):
+        return entry["expires"] is None or self.clock() < entry["expires"]
+
+    def get(self, url, headers=None, **kwargs):
+        entry = self.lookup(url)
+        if entry is not None and (self.offline or self.is_fresh(entry)):
+            self.count("hits")
+            return self.decode(entry, url)
+        if self.offline:
+            raise CacheMiss(f"{url} is not cached and the cache is offline")
+
+        # stale entries are revalidated instead of downloaded again
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        if self.throttle is not None:
+            self.throttle()
+        try:
+            response = self.session.get(url, headers=request_headers, **kwargs)
+        except requests.ConnectionError:
+            # a stale copy is better than nothing when gol.gg can't be reached
+            if entry is None:
+                raise
+            self.count("stale_served")
+            return self.decode(entry, url)
+
+        if response.status_code == 304 and entry is not None:
+            self.touch(url, entry)
+            self.count("revalidated")
+            return self.decode(entry, url)
+        # only complete pages are cached, errors go back to the caller untouched
+        if response.status_code != 200:
+            return response
+        self.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"), response.encoding, response.headers.get("Content-Type"))
+        self.count("downloaded")
+        return response
+
+    # posts are never cached, they go straight to the wrapped session
+    def post(self, url, **kwargs):
+        if self.offline:
+            raise CacheMiss(f"Can't post to {url} while the cache is offline")
+        if self.throttle is not None:
+            self.throttle()
+        return self.session.post(url, **kwargs)
+
+    def stats(self):
+        with self.lock:
+            cached = self.connection.execute("SELECT COUNT(*), COUNT(DISTINCT digest) FROM entries").fetchone()
+            return {**self.counts, "urls": cached[0], "bodies": cached[1]}
+
+    def close(self):
+        self.connection.close()
+        self.session.close()
@@ -0,0 +1,169 @@
+# sqlite store for scraped games, replaces appending to combined_match_stats.csv and tracking ids in game_ids.txt
+# a game's rows and its id are written in one transaction so a crash can never mark a game scraped without its stats
+# every scraper run gets a run id and every write a sequence number, downstream steps checkpoint on the sequence
+# so they read only the games written since they last ran, even when that was in the middle of a run
+#   python match_store.py import combined_match_stats.csv game_ids.txt   migrate the old csv and id file
+#   python match_store.py export combined_match_stats.csv                 write the csv the notebooks read
+import argparse
+import io
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# column names on csv file
+COLUMNS = ["GameID", "Team", "Result", "Game Time", "Side" ,"Patch", "Tournament", "Date", "Region", "Champion", "Player", "Role", "Level", "Kills", "Deaths", "Assists", "KDA",
+    "CS", "CS in Team's Jungle", "CS in Enemy Jungle", "CSM", "Golds", "GPM", "GOLD%", "Vision Score", "Wards placed", "Wards destroyed", "Control Wards Purchased",
+    "Detector Wards Placed", "VSPM", "WPM", "VWPM", "WCPM", "VS%", "Total damage to Champion", "Physical Damage", "Magic Damage", "True Damage", "DPM", "DMG%", "K+A Per Minute", "KP%",
+    "Solo kills", "Double kills", "Triple kills", "Quadra kills", "Penta kills", "GD@15", "CSD@15", "XPD@15", "LVLD@15", "Objectives Stolen", "Damage dealt to turrets",
+    "Damage dealt to buildings", "Total heal", "Total Heals On Teammates", "Damage self mitigated", "Total Damage Shielded On Teammates", "Time ccing others",
+    "Total Time CC Dealt", "Total damage taken", "Total Time Spent Dead", "Consumables purchased", "Items Purchased", "Shutdown bounty collected", "Shutdown bounty lost"
+]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# parses stored text the same way the notebooks read the csv so both give identical frames
+def _as_csv_frame(frame):
+    return pd.read_csv(io.StringIO(frame.to_csv(index=False)), keep_default_na=False, na_values=[""], low_memory=False)
+
+
+class MatchStore:
+    def __init__(self, path="match_stats.sqlite"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.run_id = None
+        stat_columns = ", ".join(f"{_quote(column)} TEXT" for column in COLUMNS[1:])
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS games (game_id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL, seq INTEGER NOT NULL, scraped TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS games_run ON games (run_id)")
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS stats (\"GameID\" INTEGER NOT NULL, position INTEGER NOT NULL, {stat_columns}, PRIMARY KEY (\"GameID\", position))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS checkpoints (consumer TEXT PRIMARY KEY, seq INTEGER NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS games_seq ON games (seq)")
+
+    # starts a new ingest run, every game written afterwards belongs to it
+    def start_run(self) -> int:
+        with self.lock, self.connection:
+            self.run_id = self.connection.execute("INSERT INTO runs (started) VALUES (?)", (_now(),)).lastrowid
+        return self.run_id
+
+    def game_ids(self) -> set[int]:
+        with self.lock:
+            return {row[0] for row in self.connection.execute("SELECT game_id FROM games")}
+
+    def last_run(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(MAX(run_id), 0) FROM runs").fetchone()[0]
+
+    # sequence number of the latest write, a checkpoint at it covers every game stored so far
+    def last_seq(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM games").fetchone()[0]
+
+    # replaces a game's rows and marks it scraped in one transaction, rescraping a game overwrites it
+    # every write takes the next sequence number, so a rescraped game is new again to every consumer
+    def upsert_game(self, game_id: int, rows: list[dict]):
+        if self.run_id is None:
+            self.start_run()
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        insert = f"INSERT INTO stats ({', '.join(map(_quote, COLUMNS))}, position) VALUES ({placeholders}, ?)"
+        values = [
+            [game_id] + [None if row.get(column) is None else str(row[column]) for column in COLUMNS[1:]] + [position]
+            for position, row in enumerate(rows)
+        ]
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM stats WHERE \"GameID\" = ?", (game_id,))
+            self.connection.executemany(insert, values)
+            self.connection.execute(
+                "INSERT INTO games (game_id, run_id, seq, scraped) VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM games), ?) "
+                "ON CONFLICT (game_id) DO UPDATE SET run_id = excluded.run_id, seq = excluded.seq, scraped = excluded.scraped",
+                (game_id, self.run_id, _now())
+            )
+
+    def _read(self, where, params):
+        query = (
+            f"SELECT {', '.join('s.' + _quote(column) for column in COLUMNS)} FROM stats s JOIN games g ON g.game_id = s.\"GameID\" "
+            f"WHERE {where} ORDER BY s.\"GameID\", s.position"
+        )
+        return pd.read_sql_query(query, self.connection, params=params)
+
+    # rows of every game written after since_run, in the same layout as combined_match_stats.csv
+    def read_frame(self, since_run: int = 0) -> pd.DataFrame:
+        with self.lock:
+            frame = self._read("g.run_id > ?", (since_run,))
+        return _as_csv_frame(frame)
+
+    # games written since `consumer` last called commit_checkpoint, plus the sequence number to commit once they are processed
+    # the rows and the sequence number are read together, so a write landing in between is left for the next call
+    def new_since_checkpoint(self, consumer: str) -> tuple[pd.DataFrame, int]:
+        with self.lock:
+            row = self.connection.execute("SELECT seq FROM checkpoints WHERE consumer = ?", (consumer,)).fetchone()
+            since_seq = row[0] if row else 0
+            last_seq = self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM games").fetchone()[0]
+            frame = self._read("g.seq > ? AND g.seq <= ?", (since_seq, last_seq))
+        return _as_csv_frame(frame), last_seq
+
+    def commit_checkpoint(self, consumer: str, seq: int):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO checkpoints (consumer, seq) VALUES (?, ?) ON CONFLICT (consumer) DO UPDATE SET seq = excluded.seq",
+                (consumer, seq)
+            )
+
+    # migrates the old csv and id file, ids without rows in the csv were lost between saves and are left to rescrape
+    def import_csv(self, csv_path: str, id_path: str | None = None) -> tuple[int, list[int]]:
+        frame = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        self.start_run()
+        imported = 0
+        for game_id, game_rows in frame.groupby("GameID", sort=False):
+            self.upsert_game(int(game_id), game_rows.to_dict("records"))
+            imported += 1
+        missing = []
+        if id_path is not None:
+            with open(id_path) as f:
+                saved_ids = {int(line.strip()) for line in f if line.strip().isdigit()}
+            missing = sorted(saved_ids - self.game_ids())
+        return imported, missing
+
+    def export_csv(self, csv_path: str, since_run: int = 0):
+        self.read_frame(since_run).to_csv(csv_path, index=False)
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default="match_stats.sqlite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="migrate combined_match_stats.csv and game_ids.txt")
+    import_parser.add_argument("csv_path")
+    import_parser.add_argument("id_path", nargs="?")
+    export_parser = commands.add_parser("export", help="write the stored games as a csv")
+    export_parser.add_argument("csv_path")
+    export_parser.add_argument("--since-run", type=int, default=0, help="only games written after this run")
+    args = parser.parse_args()
+
+    store = MatchStore(args.store)
+    if args.command == "import":
+        imported, missing = store.import_csv(args.csv_path, args.id_path)
+        print(f"Imported {imported} games")
+        if missing:
+            print(f"{len(missing)} ids in {args.id_path} had no rows and will be rescraped: {missing}")
+    else:
+        store.export_csv(args.csv_path, args.since_run)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
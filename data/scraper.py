@@ -1,45 +1,90 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import requests
 import time
 import random
-import pandas as pd
-import os
 import re
+from contextlib import nullcontext
+from urllib.parse import urljoin
+
+import fast_parser
+from http_cache import DEFAULT_CACHE_DIR, CachedSession
+from match_store import COLUMNS, MatchStore
+
+BASE_URL = "https://gol.gg"
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"}
+
+# form fields the list pages are guessed to submit when the "top leagues" box is ticked and refresh is clicked
+# not yet recorded from gol.gg, so selenium stays the default and a response is only used when the page shows the filter as applied
+TOP_LEAGUES_FORM = {"leagues_top": "on"}
+DISCOVERY_MODES = ("auto", "http", "selenium")
+TOURNAMENT_LIST_SELECTOR = "table.table_list.footable.toggle-square-filled"
+
+# gol.gg cuts some champion names at the apostrophe in the image alt text
+CHAMPION_NAME_FIXES = {"K": "Ksante", "Cho": "Chogath", "Kai": "Kaisa", "Rek": "Reksai"}
+
+# the header divs of a game's page-game html that hold the team level stats
+HEADER_CLASSES = {
+    "time": "col-6 text-center",
+    "patch": "col-3 text-right",
+    "date": "col-12 col-sm-5 text-right",
+    "tournament": "col-12 col-sm-7",
+    "blue": "col-12 blue-line-header",
+    "red": "col-12 red-line-header"
+}
+
+# how long cached gol.gg pages stay fresh in seconds, None means they are never fetched again, see http_cache.py
+CACHE_RULES = [
+    # finished games never change, a page without a result or stats table is fetched again later
+    (r"/game/stats/\d+/page-game/", lambda html: None if parse_team_stats(html)["BlueResult"] else 3600),
+    (r"/game/stats/\d+/page-fullstats/", lambda html: None if extract_table(html) is not None else 3600),
+    # later games of a series that is still being played show up on the summary page
+    (r"/game/stats/\d+/page-summary/", 24 * 3600),
+    (r"/tournament/tournament-matchlist/", lambda html: None if tournament_finished(html) else 3600)
+]
+
+# "fast" uses the streaming extractor in fast_parser.py, "soup" the original BeautifulSoup parser
+PARSERS = ("fast", "soup")
+DEFAULT_PARSER = "fast"
+
+# session that caches gol.gg pages on disk with CACHE_RULES, offline only replays cached pages
+def make_cached_session(session = None, cache_dir = DEFAULT_CACHE_DIR, offline = False) -> CachedSession:
+    return CachedSession(session, cache_dir, CACHE_RULES, offline = offline)
 
 class StatsScraper:
-    def __init__(self, csv_path = "combined_match_stats.csv", id_path = "game_ids.txt"):
-        self.headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"}
-        self.all_data = []
-        self.csv_path = csv_path
+    def __init__(self, store = None, session = None, base_url = BASE_URL, parser = DEFAULT_PARSER, instruments = None):
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser {parser!r}, expected one of {PARSERS}")
+        self.headers = HEADERS
+        self.parser = parser
+        # base_url can point at a local server with saved pages for offline runs
+        self.base_url = base_url
+        self.session = session if session is not None else requests.Session()
+        # rows and ids are committed together per game, see match_store.py
+        self.store = store if store is not None else MatchStore()
         # column names on csv file
-        self.columns = ["GameID", "Team", "Result", "Game Time", "Side" ,"Patch", "Tournament", "Date", "Region", "Champion", "Player", "Role", "Level", "Kills", "Deaths", "Assists", "KDA",
-            "CS", "CS in Team's Jungle", "CS in Enemy Jungle", "CSM", "Golds", "GPM", "GOLD%", "Vision Score", "Wards placed", "Wards destroyed", "Control Wards Purchased",
-            "Detector Wards Placed", "VSPM", "WPM", "VWPM", "WCPM", "VS%", "Total damage to Champion", "Physical Damage", "Magic Damage", "True Damage", "DPM", "DMG%", "K+A Per Minute", "KP%",
-            "Solo kills", "Double kills", "Triple kills", "Quadra kills", "Penta kills", "GD@15", "CSD@15", "XPD@15", "LVLD@15", "Objectives Stolen", "Damage dealt to turrets",
-            "Damage dealt to buildings", "Total heal", "Total Heals On Teammates", "Damage self mitigated", "Total Damage Shielded On Teammates", "Time ccing others",
-            "Total Time CC Dealt", "Total damage taken", "Total Time Spent Dead", "Consumables purchased", "Items Purchased", "Shutdown bounty collected", "Shutdown bounty lost"
-        ]
-        self.id_path = id_path
-        self.scraped_game_ids = self._load_saved_game_ids()
-        self._ensure_csv_headers()
-    
-    # loads previously scraped game ids to avoid duplicates
-    def _load_saved_game_ids(self) -> set[int]:
-        if not os.path.exists(self.id_path):
-            return set()
-        with open(self.id_path, "r") as f:
-            return set(int(line.strip()) for line in f if line.strip().isdigit())
-    
-    # creates csv file with headers if it doesn't exist     
-    def _ensure_csv_headers(self):
-        if not os.path.exists(self.csv_path):
-            pd.DataFrame(columns=self.columns).to_csv(self.csv_path, index = False)
+        self.columns = COLUMNS
+        # loads previously scraped game ids to avoid duplicates
+        self.scraped_game_ids = self.store.game_ids()
+        # optional instrumentation.Instruments from the repo root, times fetches, parses and store writes
+        self.instruments = instruments
+
+    # a timing span when instruments are set, otherwise a context manager that does nothing
+    def span(self, name: str, **attributes):
+        if self.instruments is None:
+            return nullcontext()
+        return self.instruments.span(name, **attributes)
+
+    def count(self, name: str, value: int = 1):
+        if self.instruments is not None:
+            self.instruments.count(name, value)
 
-    # scrapes the website for specific stats and then adds to a dictionary
+    def fetch(self, link: str) -> str:
+        with self.span("scraper.fetch", url = link):
+            response = self.session.get(link, headers = self.headers)
+        self.count("scraper.fetched_bytes", len(response.text))
+        return response.text
+
+    # scrapes the website for specific stats and then adds to the store
     def scrape_game(self, game_id: int):
         # skips if game is already scraped
         if game_id in self.scraped_game_ids:
@@ -50,189 +95,268 @@ class StatsScraper:
         team_stats = self.get_team_stats(game_id)
 
         #get individual stats
-        link = f"https://gol.gg/game/stats/{game_id}/page-fullstats/"
-        response = requests.get(link, headers = self.headers)
-        soup = BeautifulSoup(response.text,"html.parser")
-
-        table = soup.find("table")
-        if not table:
+        html = self.fetch(f"{self.base_url}/game/stats/{game_id}/page-fullstats/")
+        with self.span("scraper.parse_fullstats"):
+            rows = parse_fullstats(html, game_id, team_stats, self.parser)
+        if rows is None:
+            self.count("scraper.games_without_stats")
             return
-        
-        # extract champion names from <thead>
-        thead = table.find("thead")
-        champions = []
-        if thead:
-            # skip first <th> since it is a label
-            ths = thead.find_all("th")[1:]  
-            for th in ths:
-                img = th.find("img")
-                if img and img.has_attr("alt"):
-                    champ_name = img["alt"]
-                    if champ_name == "K":
-                        champ_name = "Ksante"
-                    elif champ_name == "Cho":
-                        champ_name = "Chogath"
-                    elif champ_name == "Kai":
-                        champ_name = "Kaisa"
-                    if champ_name == "Rek":
-                        champ_name = "Reksai"
-                    champions.append(champ_name)
-        
-        rows = table.find_all("tr")[1:]
-
-        data_per_champ = {}
-        
-        # sets first 5 champions to Blue since blue side is the one scraped first 
-        for i in range(len(champions)):
-            if i < 5:
-                side = "Blue"
-            else:
-                side = "Red"
-            if side == "Blue":
-                team = team_stats["BlueTeam"]
-                result = team_stats["BlueResult"]
-            else:
-                team = team_stats["RedTeam"]
-                result = team_stats["RedResult"]
-            
-            data_per_champ[i] = { "GameID": game_id, "Team": team, "Result": result, "Game Time": team_stats.get("Game Time", ""), "Side": side, "Patch":team_stats.get("Patch", ""),
-                                  "Tournament": team_stats.get("Tournament", ""), "Date": team_stats.get("Date", ""), "Region": team_stats.get("Region", ""), "Champion": champions[i] 
-                                  }
-
-        # gets <td> cells from <tr> rows
-        for row in rows:
-            cells = row.find_all("td")
-            if not cells:
-                continue
-            # gets the stat label name
-            stat_name = cells[0].get_text(strip=True)
-            # skips first label cell 
-            for i, cell in enumerate(cells[1:]):
-                data_per_champ[i][stat_name] = cell.get_text(strip=True)
-        self.all_data.extend(data_per_champ.values())
+        self.record_game(game_id, rows)
 
+    # writes a parsed game's rows and marks its id as scraped in one transaction
+    def record_game(self, game_id: int, rows: list[dict]):
+        with self.span("scraper.store"):
+            self.store.upsert_game(game_id, rows)
         self.scraped_game_ids.add(game_id)
-        with open(self.id_path, "a") as f:
-            f.write(str(game_id) + "\n")
+        self.count("scraper.games")
     
-    # saves data to csv
-    def save(self):
-        if not self.all_data:
-            print("No data to save.")
-            return
+    # scrapes team stats (not available on the stats for individuals)
+    def get_team_stats(self, game_id:int) -> dict:
+        html = self.fetch(f"{self.base_url}/game/stats/{game_id}/page-game/")
+        with self.span("scraper.parse_team_stats"):
+            return parse_team_stats(html, self.parser)
+
 
-        df = pd.DataFrame(self.all_data)
+# same output as fast_parser.extract_header, from a BeautifulSoup tree
+def soup_header(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+    header = {}
+    for class_name in HEADER_CLASSES.values():
+        div = soup.find("div", class_ = class_name)
+        if div:
+            a_tag = div.find("a")
+            h1 = div.find("h1")
+            header[class_name] = {
+                "text": div.text,
+                "stripped": div.get_text(strip = True),
+                "a": a_tag.get_text(strip = True) if a_tag else None,
+                "h1": h1.get_text(strip = True) if h1 else None
+            }
+    return header
 
-        # ensure all columns exist in the right order
-        for col in self.columns:
-            if col not in df.columns:
-                df[col] = ""
 
-        df = df[self.columns]
-        df.to_csv(self.csv_path, mode="a", index=False, header=False)
+# same output as fast_parser.extract_table, from a BeautifulSoup tree
+def soup_table(html: str) -> tuple[list[str], list[list[str]]] | None:
+    soup = BeautifulSoup(html,"html.parser")
 
-        self.all_data.clear()
+    table = soup.find("table")
+    if not table:
+        return None
     
-    # scrapes team stats (not available on the stats for individuals)
-    def get_team_stats(self, game_id:int) -> dict:
-        link = f"https://gol.gg/game/stats/{game_id}/page-game/"
-        response = requests.get(link, headers = self.headers)
-        soup = BeautifulSoup(response.text, "html.parser")
+    # extract champion icons from <thead>
+    thead = table.find("thead")
+    alts = []
+    if thead:
+        # skip first <th> since it is a label
+        ths = thead.find_all("th")[1:]  
+        for th in ths:
+            img = th.find("img")
+            if img and img.has_attr("alt"):
+                alts.append(img["alt"])
 
-        # initialize dictionary for team level stats
-        team_stats = {"BlueTeam": "", "RedTeam": "", "BlueResult": "", "RedResult": "", "Game Time": "", "Side": "", "Patch": "", "Tournament": "", "Date": "", "Region": ""}
-        
-        # extracts game time
-        time_div = soup.find("div", class_= "col-6 text-center")
-        if time_div:
-            h1 = time_div.find("h1")
-            if h1:
-                team_stats["Game Time"] = h1.get_text(strip = True)
-
-        # extracts patch version
-        patch_div = soup.find("div", class_= "col-3 text-right")
-        if patch_div:
-            team_stats["Patch"] = patch_div.get_text(strip = True)
-        
-        # extracts date string in YYYY-MM-DD format
-        date_div = soup.find("div", class_= "col-12 col-sm-5 text-right")
-        if date_div:
-            date_text = date_div.get_text(strip = True)
-            match = match = re.search(r"\d{4}-\d{2}-\d{2}", date_text)
-            if match:
-                team_stats["Date"] = match.group(0)
-
-        # extracts tournament name and region
-        tournament_div = soup.find("div", class_="col-12 col-sm-7")
-        if tournament_div:
-            a_tag = tournament_div.find("a")
-            if a_tag:
-                team_stats["Tournament"] = a_tag.get_text(strip = True)
-                full_text = tournament_div.get_text(strip=True)
-                match = re.search(r"\(([^)]+)\)", full_text)
-                if match:
-                    team_stats["Region"] = match.group(1)
-
-        # extracts blue side team name and results             
-        blue_div = soup.find("div", class_="col-12 blue-line-header")
-        if blue_div:
-            a_tag = blue_div.find("a")
-            if a_tag:
-                team_stats["BlueTeam"] = a_tag.get_text(strip = True)
-            if "-" in blue_div.text:
-                team_stats["BlueResult"] = blue_div.text.split("-")[-1].strip()
+    # gets <td> cells from <tr> rows
+    rows = [[cell.get_text(strip=True) for cell in row.find_all("td")] for row in table.find_all("tr")[1:]]
+    return alts, rows
+
+
+def extract_header(html: str, parser: str = DEFAULT_PARSER) -> dict:
+    if parser == "soup":
+        return soup_header(html)
+    return fast_parser.extract_header(html, HEADER_CLASSES.values())
+
+
+def extract_table(html: str, parser: str = DEFAULT_PARSER) -> tuple[list[str], list[list[str]]] | None:
+    if parser == "soup":
+        return soup_table(html)
+    return fast_parser.extract_table(html)
+
+
+# extracts team level stats from a game's page-game html
+def parse_team_stats(html: str, parser: str = DEFAULT_PARSER) -> dict:
+    header = extract_header(html, parser)
+
+    # initialize dictionary for team level stats
+    team_stats = {"BlueTeam": "", "RedTeam": "", "BlueResult": "", "RedResult": "", "Game Time": "", "Side": "", "Patch": "", "Tournament": "", "Date": "", "Region": ""}
+    
+    # extracts game time
+    time_div = header.get(HEADER_CLASSES["time"])
+    if time_div and time_div["h1"] is not None:
+        team_stats["Game Time"] = time_div["h1"]
+
+    # extracts patch version
+    patch_div = header.get(HEADER_CLASSES["patch"])
+    if patch_div:
+        team_stats["Patch"] = patch_div["stripped"]
+    
+    # extracts date string in YYYY-MM-DD format
+    date_div = header.get(HEADER_CLASSES["date"])
+    if date_div:
+        match = re.search(r"\d{4}-\d{2}-\d{2}", date_div["stripped"])
+        if match:
+            team_stats["Date"] = match.group(0)
+
+    # extracts tournament name and region
+    tournament_div = header.get(HEADER_CLASSES["tournament"])
+    if tournament_div and tournament_div["a"] is not None:
+        team_stats["Tournament"] = tournament_div["a"]
+        match = re.search(r"\(([^)]+)\)", tournament_div["stripped"])
+        if match:
+            team_stats["Region"] = match.group(1)
+
+    # extracts blue side team name and results             
+    blue_div = header.get(HEADER_CLASSES["blue"])
+    if blue_div:
+        if blue_div["a"] is not None:
+            team_stats["BlueTeam"] = blue_div["a"]
+        if "-" in blue_div["text"]:
+            team_stats["BlueResult"] = blue_div["text"].split("-")[-1].strip()
+    
+    #extracts red side team name and results
+    red_div = header.get(HEADER_CLASSES["red"])
+    if red_div:
+        if red_div["a"] is not None:
+            team_stats["RedTeam"] = red_div["a"]
+        if "-" in red_div["text"]:
+            team_stats["RedResult"] = red_div["text"].split("-")[-1].strip()
         
-        #extracts red side team name and results
-        red_div = soup.find("div", class_="col-12 red-line-header")
-        if red_div:
-            a_tag = red_div.find("a")
-            if a_tag:
-                team_stats["RedTeam"] = a_tag.get_text(strip = True)
-            if "-" in red_div.text:
-                team_stats["RedResult"] = red_div.text.split("-")[-1].strip()
-            
-        return team_stats
+    return team_stats
+
 
+# extracts one row per champion from a game's page-fullstats html, None if the page has no stats table
+def parse_fullstats(html: str, game_id: int, team_stats: dict, parser: str = DEFAULT_PARSER) -> list[dict] | None:
+    table = extract_table(html, parser)
+    if table is None:
+        return None
+    alts, rows = table
+    champions = [CHAMPION_NAME_FIXES.get(alt, alt) for alt in alts]
+
+    data_per_champ = {}
+    
+    # sets first 5 champions to Blue since blue side is the one scraped first 
+    for i in range(len(champions)):
+        if i < 5:
+            side = "Blue"
+        else:
+            side = "Red"
+        if side == "Blue":
+            team = team_stats["BlueTeam"]
+            result = team_stats["BlueResult"]
+        else:
+            team = team_stats["RedTeam"]
+            result = team_stats["RedResult"]
         
+        data_per_champ[i] = { "GameID": game_id, "Team": team, "Result": result, "Game Time": team_stats.get("Game Time", ""), "Side": side, "Patch":team_stats.get("Patch", ""),
+                              "Tournament": team_stats.get("Tournament", ""), "Date": team_stats.get("Date", ""), "Region": team_stats.get("Region", ""), "Champion": champions[i] 
+                              }
+
+    for cells in rows:
+        if not cells:
+            continue
+        # gets the stat label name
+        stat_name = cells[0]
+        # skips first label cell 
+        for i, cell in enumerate(cells[1:]):
+            data_per_champ[i][stat_name] = cell
+    return list(data_per_champ.values())
+
+# parses both pages of a game, module level so it can run in a worker process
+def parse_game(game_html: str, fullstats_html: str, game_id: int, parser: str = DEFAULT_PARSER) -> list[dict] | None:
+    return parse_fullstats(fullstats_html, game_id, parse_team_stats(game_html, parser), parser)
+
     
-def get_matchlist_links() -> list[str]:
-    # launches a Chrome browser and goes to list of tournaments 
+# reads a gol.gg list page with the "top leagues" filter applied in a real browser, only used as a fallback
+def selenium_page_source(url: str, wait_selector: str) -> str:
+    # selenium is optional, plain http discovery doesn't need it
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    # launches a Chrome browser and goes to the list page
     driver = webdriver.Chrome()
-    driver.get("https://gol.gg/tournament/list/")
+    try:
+        driver.get(url)
+
+        # select the top checkbox to filter for only major regions
+        checkbox = driver.find_element(By.ID, "leagues_top")
+        checkbox.click()
+
+        # clicks the refresh button to reload table with filter applied
+        refresh_button = driver.find_element(By.ID,"btn_refresh")
+        refresh_button.click() 
+
+        # waits until table is present avoids stale element reference
+        WebDriverWait(driver,10).until(EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector)))
+        return driver.page_source
+    finally:
+        driver.quit()
 
-    # select the top checkbox to filter for only major regions
-    checkbox = driver.find_element(By.ID, "leagues_top")
-    checkbox.click()
+# the same filtered list page fetched with the plain http client by submitting the form the refresh button sends
+def http_page_source(url: str, session = None, form: dict = TOP_LEAGUES_FORM) -> str:
+    session = session if session is not None else requests
+    response = session.post(url, data = form, headers = HEADERS)
+    response.raise_for_status()
+    return response.text
 
+# whether a list page was rendered with every field of form set, a page that ignored the form shows its defaults
+def form_applied(html: str, form: dict) -> bool:
+    soup = BeautifulSoup(html, "html.parser")
+    for name, value in form.items():
+        field = soup.find("input", attrs = {"name": name})
+        if field is None:
+            return False
+        if field.get("type") == "checkbox":
+            if not field.has_attr("checked"):
+                return False
+        elif field.get("value") != value:
+            return False
+    return True
 
-    # clicks the refresh button to reload table with filter applied
-    refresh_button = driver.find_element(By.ID,"btn_refresh")
-    refresh_button.click() 
+# fetches a filtered list page over http and falls back to selenium when that doesn't give a usable table
+# an ignored filter would silently give every league, so the http page is only used when it shows the filter applied
+# mode is "http", "selenium" or "auto"
+def discover_page(url: str, parse, wait_selector: str, session = None, mode: str = "auto", form: dict = TOP_LEAGUES_FORM):
+    if mode not in DISCOVERY_MODES:
+        raise ValueError(f"Unknown discovery mode {mode!r}, expected one of {DISCOVERY_MODES}")
+    if mode != "http":
+        try:
+            return parse(selenium_page_source(url, wait_selector), url)
+        except Exception as e:
+            # the http form is only tried on its own when there's no browser to run
+            if mode == "selenium":
+                raise
+            print(f"Selenium discovery of {url} failed ({e!r}), trying the http form")
+    html = http_page_source(url, session, form)
+    if not form_applied(html, form):
+        raise ValueError(f"The http response for {url} doesn't show the filter {form} as applied, check TOP_LEAGUES_FORM or use selenium")
+    return parse(html, url)
 
-    # waits until table is present avoids stale element reference
-    WebDriverWait(driver,10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "table.table_list.footable.toggle-square-filled a")))
+# matchlist urls of every major region tournament
+def get_matchlist_links(session = None, mode: str = "auto", base_url: str = BASE_URL) -> list[str]:
+    return discover_page(f"{base_url}/tournament/list/", parse_matchlist_links, f"{TOURNAMENT_LIST_SELECTOR} a", session, mode)
 
-    # get the links from the table
-    links = driver.find_elements(By.CSS_SELECTOR, "table.table_list.footable.toggle-square-filled a")
+# extracts every tournament's matchlist url from the tournament list page
+def parse_matchlist_links(html: str, page_url: str) -> list[str]:
+    soup = BeautifulSoup(html,"html.parser")
     tournament_links = []
 
     # gets each individual tournament's matchlist from major regions
-    for link in links:
-        href = link.get_attribute("href")
+    for a_tag in soup.select(f"{TOURNAMENT_LIST_SELECTOR} a"):
+        href = a_tag.get("href")
         if href is not None:
-            # converts stats page to matchlist url
-            href = href.replace("tournament-stats", "tournament-matchlist")
+            # converts stats page to matchlist url, resolved against the page like the browser does
+            href = urljoin(page_url, href.replace("tournament-stats", "tournament-matchlist"))
             tournament_links.append(href)
-    
-    driver.quit()
     return tournament_links
 
-def get_games_links(tournament_link: str) -> list[str]:
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"}
-    response = requests.get(tournament_link, headers = headers)
-    
-    
-    soup = BeautifulSoup(response.text,"html.parser")
+def get_games_links(tournament_link: str, session = None) -> list[str]:
+    session = session if session is not None else requests
+    response = session.get(tournament_link, headers = HEADERS)
+    return parse_games_links(response.text)
+
+# extracts the summary links of every game from a tournament matchlist page
+def parse_games_links(html: str) -> list[str]:
+    soup = BeautifulSoup(html,"html.parser")
     table = soup.select_one('table.table_list.footable.toggle-square-filled')
     games_links = []
     if not table:
@@ -247,59 +371,72 @@ def get_games_links(tournament_link: str) -> list[str]:
             games_links.append(href)
     return games_links
 
+# a tournament is finished once every match on its matchlist has been played and links to its games
+def tournament_finished(html: str) -> bool:
+    soup = BeautifulSoup(html,"html.parser")
+    table = soup.select_one('table.table_list.footable.toggle-square-filled')
+    tbody = table.find("tbody") if table else None
+    if not tbody:
+        return False
+    rows = tbody.find_all("tr")
+    return bool(rows) and all(row.find("a", href = re.compile(r"/page-(game|summary)/$")) for row in rows)
+
+# converts a relative matchlist link to a full url
+def summary_url(link: str, base_url: str = BASE_URL) -> str:
+    return f"{base_url}{link.lstrip('..')}"
+
     # extracts unique game ids from a list of links
-def get_game_id(links: list[str]) -> list[int]:
-    base_url = "https://gol.gg"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"}
+def get_game_id(links: list[str], session = None, base_url: str = BASE_URL) -> list[int]:
+    session = session if session is not None else requests
     game_ids = []
     for link in links:
         # get the game id from the link using regex
         match = re.search(r"/game/stats/(\d+)", link)
         if not match:
             continue
-        game_ids.append(int(match.group(1)))
         base_game_id = int(match.group(1))
 
         # checks to see if there is more than just game 1 in the page (looks for game 2/3/4/5 and appends)
-        full_url = f"{base_url}{link.lstrip('..')}"
-        response = requests.get(full_url, headers=headers)
-        soup = BeautifulSoup(response.text,"html.parser")
-        nav = soup.find("div", id = "gameMenuToggler")
-        if nav:
-            for a_tag in nav.find_all("a", class_= "nav-link"):
-                href = a_tag.get("href","")
-                match = re.search(r"/game/stats/(\d+)/page-game", href)
-                if match:
-                    game_id = int(match.group(1))
-                    if game_id != base_game_id:
-                        game_ids.append(game_id)
+        response = session.get(summary_url(link, base_url), headers=HEADERS)
+        game_ids.extend(parse_series_game_ids(response.text, base_game_id))
 
     return sorted(game_ids)
 
+# game ids of every game in a series from its summary page, starting with the linked game
+def parse_series_game_ids(html: str, base_game_id: int) -> list[int]:
+    game_ids = [base_game_id]
+    soup = BeautifulSoup(html,"html.parser")
+    nav = soup.find("div", id = "gameMenuToggler")
+    if nav:
+        for a_tag in nav.find_all("a", class_= "nav-link"):
+            href = a_tag.get("href","")
+            match = re.search(r"/game/stats/(\d+)/page-game", href)
+            if match:
+                game_id = int(match.group(1))
+                if game_id != base_game_id:
+                    game_ids.append(game_id)
+    return game_ids
+
 def main():
-    links = get_matchlist_links()[::-1]
+    # pages already cached are not downloaded again, so rerunning after an interruption is almost free
+    session = make_cached_session()
+    links = get_matchlist_links(session)[::-1]
     games_links = []
     link = links[-1]
     # iterate through all the links to get all the game links
     #for link in links:
-    games_links.extend(get_games_links(link))
+    games_links.extend(get_games_links(link, session))
     # sleep for random duration to avoid overloading server
     time.sleep(random.uniform(1, 3))
         
-    scraper = StatsScraper()
-    ids = get_game_id(games_links)
-    batch_size = 10
-    for i, id in enumerate(ids,1):
+    scraper = StatsScraper(session = session)
+    ids = get_game_id(games_links, session)
+    scraper.store.start_run()
+    for id in ids:
         scraper.scrape_game(id)
-        # only save onto csv file every 10 games
-        if i % batch_size == 0:
-            scraper.save()
         # sleep for random duration to avoid overloading server
         time.sleep(random.uniform(1, 3))
 
-    # save remaining games onto csv file
-    scraper.save()
-
 
 if __name__ == "__main__":
     main()
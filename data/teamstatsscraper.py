@@ -1,48 +1,51 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import argparse
+
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
 
-# launches a Chrome browser and goes to list of team stats for tournaments
+from scraper import BASE_URL, DISCOVERY_MODES, discover_page
+
+# list of team stats for tournaments
+TEAM_STATS_URL = f"{BASE_URL}/teams/list/season-S15/split-ALL/tournament-ALL/"
 
-driver = webdriver.Chrome()
-url = "https://gol.gg/teams/list/season-S15/split-ALL/tournament-ALL/"
-driver.get(url)
+# initialize headers
+TEAM_STATS_COLUMNS = ["Name", "Season", "Region", "Games", "WinRate", "KDA", "GPM", "GDM", "GameDuration","KillsPerGame", "DeathsPerGame", "TowersKilled", "TowersLost", "FB%", "FT%", "FOS%",
+           "DRAPG", "DRA%", "VGPG", "HER%", "ATAKHAN%", "DRA@15", "TD@15", "GD@15", "PPG", "NASHPG", "NASH%", "CSM", "DPM", "WPM", "VWPM", "WCPM"]
 
-# select the top checkbox to filter for only major regions
-checkbox = driver.find_element(By.ID, "leagues_top")
-checkbox.click()
 
-# clicks the refresh button to reload table with filter applied
-refresh_button = driver.find_element(By.ID,"btn_refresh")
-refresh_button.click() 
+# extracts the team stats table from the team list page
+def parse_team_list(html: str, page_url: str = TEAM_STATS_URL) -> pd.DataFrame:
+    soup = BeautifulSoup(html, "html.parser")
 
-# waits until table is present avoids stale element reference
-WebDriverWait(driver,10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "table.table_list tbody tr")))
+    # find <tr> rows since these store the stats
+    table = soup.find("table", class_="table_list")
+    tbody = table.find("tbody") if table else None
+    rows = tbody.find_all("tr") if tbody else []
 
+    # extract data
+    data = []
+    for row in rows:
+        cols = row.find_all("td")
+        row_data = [col.text.strip() for col in cols]
+        data.append(row_data)
 
-# swap to beautifulsoup 
-soup = BeautifulSoup(driver.page_source, "html.parser")
-driver.quit()
+    return pd.DataFrame(data, columns=TEAM_STATS_COLUMNS)
 
-# find <tr> rows since these store the stats
-table = soup.find("table", class_="table_list")
-rows = table.find("tbody").find_all("tr")
 
-# initialize headers
-headers = ["Name", "Season", "Region", "Games", "WinRate", "KDA", "GPM", "GDM", "GameDuration","KillsPerGame", "DeathsPerGame", "TowersKilled", "TowersLost", "FB%", "FT%", "FOS%",
-           "DRAPG", "DRA%", "VGPG", "HER%", "ATAKHAN%", "DRA@15", "TD@15", "GD@15", "PPG", "NASHPG", "NASH%", "CSM", "DPM", "WPM", "VWPM", "WCPM"]
+# team stats of every major region team, written to csv_path unless it is None
+# mode "http" uses the plain http client, "selenium" a browser and "auto" falls back to the browser when http fails
+def scrape_team_stats(session = None, mode: str = "auto", url: str = TEAM_STATS_URL, csv_path: str | None = "team_stats_s15.csv") -> pd.DataFrame:
+    df = discover_page(url, parse_team_list, "table.table_list tbody tr", session, mode)
+    if csv_path is not None:
+        df.to_csv(csv_path, index=False)
+    return df
 
-# extract data
-data = []
-for row in rows:
-    cols = row.find_all("td")
-    row_data = [col.text.strip() for col in cols]
-    data.append(row_data)
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=DISCOVERY_MODES, default="auto", help="how the filtered list page is fetched")
+    parser.add_argument("--url", default=TEAM_STATS_URL)
+    parser.add_argument("--csv-path", default="team_stats_s15.csv")
+    args = parser.parse_args()
 
-df = pd.DataFrame(data, columns=headers)
-df.to_csv("team_stats_s15.csv", index=False)
+    scrape_team_stats(mode=args.mode, url=args.url, csv_path=args.csv_path)
@@ -0,0 +1,134 @@
+# team elo as calculate_team_elo_regional in test_models.ipynb computes it, kept as state that new games update in place
+# teams start at their region's base elo (region of their first game) and every game moves both teams by K * surprise
+# the state is saved as part of models/feature_pipeline.pkl by features.py, which also writes models/final_team_elos.pkl from it
+import bisect
+
+import numpy as np
+
+K_FACTOR = 32
+REGION_BASE_ELO = {"kr": 1650, "cn": 1600, "euw": 1500, "na": 1450, "wr": 1450}
+
+
+# probability the first team beats the second with the standard elo formula
+def expected_score(elo, opponent_elo):
+    return 1 / (1 + 10 ** ((opponent_elo - elo) / 400))
+
+
+# region of every game from the one hot Region_ columns, cn is the dropped category
+def game_regions(df):
+    regions = np.full(len(df), "cn", dtype=object)
+    for region in REGION_BASE_ELO:
+        column = f"Region_{region}"
+        if column in df.columns:
+            regions[df[column].to_numpy() == 1] = region
+    return regions
+
+
+class EloRatings:
+    def __init__(self, k_factor=K_FACTOR, base_elo=REGION_BASE_ELO):
+        self.k_factor = k_factor
+        self.base_elo = dict(base_elo)
+        self.ratings = {}
+        self.regions = {}
+        # per team game ids and the elo after each of them, in game order, for point in time lookups
+        self.team_game_ids = {}
+        self.team_history = {}
+        self.last_game_id = None
+
+    def add_team(self, team, region):
+        if team not in self.ratings:
+            self.ratings[team] = float(self.base_elo[region])
+            self.regions[team] = region
+            self.team_game_ids[team] = []
+            self.team_history[team] = []
+
+    # applies one finished game in O(1), games have to come in GameID order like the notebook replays them
+    # region only matters for teams playing their first game, returns both teams' elo after the game
+    def update(self, game_id, blue_team, red_team, blue_won, region):
+        if self.last_game_id is not None and game_id <= self.last_game_id:
+            raise ValueError(f"Game {game_id} is not after the last applied game {self.last_game_id}, rebuild the ratings instead")
+        self.add_team(blue_team, region)
+        self.add_team(red_team, region)
+
+        if blue_won:
+            winner, loser = blue_team, red_team
+        else:
+            winner, loser = red_team, blue_team
+        change = self.k_factor * (1 - expected_score(self.ratings[winner], self.ratings[loser]))
+        self.ratings[winner] += change
+        self.ratings[loser] -= change
+
+        for team in (blue_team, red_team):
+            self.team_game_ids[team].append(game_id)
+            self.team_history[team].append(self.ratings[team])
+        self.last_game_id = game_id
+        return self.ratings[blue_team], self.ratings[red_team]
+
+    def rating(self, team):
+        return self.ratings[team]
+
+    # elo of a team going into game_id, only games before it count so training features don't leak the result
+    # with after=True the game itself is included, which is what the notebook stored per row
+    def rating_at(self, team, game_id, after=False):
+        game_ids = self.team_game_ids[team]
+        position = bisect.bisect_right(game_ids, game_id) if after else bisect.bisect_left(game_ids, game_id)
+        if position == 0:
+            return float(self.base_elo[self.regions[team]])
+        return self.team_history[team][position - 1]
+
+    # the dict models/final_team_elos.pkl holds
+    def final_team_elos(self):
+        return dict(self.ratings)
+
+    # replays every game from scratch, games are sorted by GameID first
+    # returns the elo of both teams before and after every game in the sorted order
+    @classmethod
+    def rebuild(cls, game_ids, blue_teams, red_teams, blue_won, regions, k_factor=K_FACTOR, base_elo=REGION_BASE_ELO):
+        order = np.argsort(np.asarray(game_ids), kind="stable")
+        game_ids = np.asarray(game_ids)[order]
+        blue_teams = np.asarray(blue_teams)[order]
+        red_teams = np.asarray(red_teams)[order]
+        blue_won = np.asarray(blue_won, dtype=bool)[order]
+        regions = np.asarray(regions, dtype=object)[order]
+
+        # teams as indexes into one ratings array, each starting at the base elo of its first game's region
+        teams, team_index = np.unique(np.concatenate([blue_teams, red_teams]), return_inverse=True)
+        blue_index, red_index = team_index[:len(game_ids)], team_index[len(game_ids):]
+        first_game = np.full(len(teams), len(game_ids))
+        np.minimum.at(first_game, blue_index, np.arange(len(game_ids)))
+        np.minimum.at(first_game, red_index, np.arange(len(game_ids)))
+        team_regions = regions[first_game]
+
+        # elo is sequential, every game depends on the ratings the previous ones left, so this stays one pass
+        before = np.empty((len(game_ids), 2))
+        after = np.empty((len(game_ids), 2))
+        values = [float(base_elo[region]) for region in team_regions]
+        for i, (blue, red, won) in enumerate(zip(blue_index.tolist(), red_index.tolist(), blue_won.tolist())):
+            before[i] = values[blue], values[red]
+            winner, loser = (blue, red) if won else (red, blue)
+            change = k_factor * (1 - expected_score(values[winner], values[loser]))
+            values[winner] += change
+            values[loser] -= change
+            after[i] = values[blue], values[red]
+
+        elo = cls(k_factor, base_elo)
+        for team, region, rating in zip(teams.tolist(), team_regions.tolist(), values):
+            elo.ratings[team] = rating
+            elo.regions[team] = region
+        # per team history from the after columns, grouped with one stable sort
+        sides = np.concatenate([blue_index, red_index])
+        side_game_ids = np.concatenate([game_ids, game_ids])
+        side_after = np.concatenate([after[:, 0], after[:, 1]])
+        by_team = np.lexsort((side_game_ids, sides))
+        boundaries = np.searchsorted(sides[by_team], np.arange(len(teams) + 1))
+        for position, team in enumerate(teams.tolist()):
+            rows = by_team[boundaries[position]:boundaries[position + 1]]
+            elo.team_game_ids[team] = side_game_ids[rows].tolist()
+            elo.team_history[team] = side_after[rows].tolist()
+        elo.last_game_id = int(game_ids[-1]) if len(game_ids) else None
+        return elo, game_ids, before, after
+
+    # rebuilds from the blue/red rows of data/processed_historical_data.csv
+    @classmethod
+    def from_processed(cls, df, k_factor=K_FACTOR, base_elo=REGION_BASE_ELO):
+        return cls.rebuild(df["GameID"], df["blue_Team"], df["red_Team"], df["blue_Result"] == 1, game_regions(df), k_factor, base_elo)
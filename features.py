@@ -0,0 +1,453 @@
+# the feature engineering of data/teammatchhistory.ipynb and test_models.ipynb as stages that run headless
+#   team_games       scraped player rows (MatchStore / combined_match_stats.csv) -> one row per team per game
+#   normalize        lowercased names as categoricals so string work runs once per unique name, rows in GameID order
+#   Encoders         label and one hot encoding with the classes LolPredictor and the pickles use
+#   pivot_sides      one blue/red row per game, the processed_historical_data.csv layout
+#   FeaturePipeline  elo and point in time player averages, built from scratch, updated with new games only, or replayed
+#                    from the processed rows when games come in before ones already processed
+#   model_features   drops the in game stats that leak the result
+#     python features.py build                    rebuild data/processed_historical_data.csv and models/feature_pipeline.pkl
+#     python features.py update --store <path>    add the games scraped since the last update, re-exporting models/bundle
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from elo import EloRatings, game_regions
+from player_stats import ROLES, SIDES, STAT_COLUMNS, PlayerStats
+
+# per role columns of the team rows, in the order teammatchhistory.ipynb merged them
+ROLE_COLUMNS = {
+    "Champion": "champion", "Player": "player", "Kills": "kills", "Assists": "assists", "Deaths": "deaths",
+    "KP%": "kp%", "DMG%": "dmg%", "K+A Per Minute": "ka_per_minute", "GD@15": "gd@15"
+}
+# the game teammatchhistory.ipynb drops
+DROPPED_GAMES = [63197]
+GAME_LEVEL_COLUMNS = ["GameID", "Date", "Game Time"]
+PIPELINE_PATH = "models/feature_pipeline.pkl"
+PROCESSED_PATH = "data/processed_historical_data.csv"
+HISTORY_PATH = "data/combined_team_match_history.csv"
+
+
+# maps each category of a one hot encoder to its feature name (None for the dropped category)
+def one_hot_features(encoder, prefix):
+    categories = encoder.categories_[0].tolist()
+    dropped = None
+    if encoder.drop_idx_ is not None and encoder.drop_idx_[0] is not None:
+        dropped = categories.pop(encoder.drop_idx_[0])
+    feature_names = encoder.get_feature_names_out([prefix]).tolist()
+
+    features = {dropped: None} if dropped is not None else {}
+    features.update(zip(categories, feature_names))
+    return features
+
+
+# columns that are only known once the game is played, the in_game_stats list of test_models.ipynb
+def in_game_columns():
+    columns = ["red_Result"] + GAME_LEVEL_COLUMNS
+    for side in SIDES:
+        columns += [f"{side}_{column}" for column in ["Kills", "Deaths", "Assists", "GD@15", "Side"]]
+        columns += [f"{side}_{role}_{stat}" for stat in ROLE_COLUMNS.values() if stat not in ("champion", "player") for role in ROLES]
+    return columns
+
+
+def parse_percent(values):
+    return (values.str.rstrip("%").astype(float) / 100).round(3)
+
+
+# teammatchhistory.ipynb: cleans the scraped player rows and sums them up per team, with one column per role and stat
+def team_games(player_rows):
+    rows = player_rows[~player_rows["GameID"].isin(DROPPED_GAMES)]
+    game_time = pd.to_timedelta("00:" + rows["Game Time"]).dt.total_seconds()
+    players = pd.DataFrame({
+        "GameID": rows["GameID"],
+        # fix team names for anyone's legend and psg talon has renamed themselves
+        "Team": rows["Team"].str.replace("anyone s legend", "Anyones Legend", case=False).str.replace("^talon$", "PSG Talon", case=False, regex=True),
+        "Date": rows["Date"],
+        "Region": rows["Region"],
+        "Kills": rows["Kills"],
+        "Deaths": rows["Deaths"],
+        "Assists": rows["Assists"],
+        "Result": rows["Result"].map({"WIN": 1, "LOSS": 0}),
+        "Game Time": game_time,
+        "Side": rows["Side"].map({"Blue": 1, "Red": 0}),
+        "Patch": rows["Patch"].astype(str).str.lstrip("v"),
+        "GD@15": rows["GD@15"].astype(float),
+        "Role": rows["Role"],
+        "Champion": rows["Champion"].str.replace(r"\bRek\b", "Reksai", regex=True).str.replace(r"\bKha\b", "Khazix", regex=True),
+        "Player": rows["Player"],
+        "KP%": parse_percent(rows["KP%"]),
+        "DMG%": parse_percent(rows["DMG%"]),
+        "K+A Per Minute": rows["K+A Per Minute"]
+    })
+
+    teams = players.groupby(["GameID", "Team"]).agg({
+        "Date": "first", "Region": "first", "Kills": "sum", "Deaths": "sum", "Assists": "sum", "Result": "first",
+        "Game Time": "first", "Side": "first", "Patch": "first", "GD@15": "sum"
+    })
+    # one groupby for every per role column instead of one per stat, unstacked to stat then role like the merges
+    roles = players.groupby(["GameID", "Team", "Role"])[list(ROLE_COLUMNS)].first().unstack("Role")
+    roles.columns = [f"{role}_{ROLE_COLUMNS[column]}" for column, role in roles.columns]
+    return teams.join(roles).reset_index()
+
+
+# lowercases names on the categories only, the codes are then the ones LabelEncoder gives the lowercased names
+def lower_categorical(values):
+    values = pd.Categorical(values)
+    lowered = values.categories.str.lower()
+    categories = lowered.unique().sort_values()
+    mapping = categories.get_indexer(lowered)
+    codes = np.where(values.codes >= 0, mapping[values.codes], -1)
+    return pd.Categorical.from_codes(codes, categories)
+
+
+# test_models.ipynb: lowercases teams, regions, players and champions and orders the rows by game
+def normalize(team_rows):
+    text_columns = ["Team", "Region"] + [f"{role}_{kind}" for kind in ["player", "champion"] for role in ROLES]
+    columns = {}
+    for column in team_rows.columns:
+        if column in text_columns:
+            columns[column] = lower_categorical(team_rows[column])
+        elif column == "Patch":
+            columns[column] = pd.Categorical(team_rows[column].astype(str))
+        elif column == "Date":
+            columns[column] = pd.to_datetime(team_rows[column])
+        else:
+            columns[column] = team_rows[column].to_numpy()
+    frame = pd.DataFrame(columns)
+    # the notebook sorts by date then by GameID, only the GameID order is left once the sides are pivoted
+    return frame.sort_values("GameID", kind="stable", ignore_index=True)
+
+
+class Encoders:
+    # label_classes is {"team": classes, "player": {column: classes}, "champion": {column: classes}}
+    # and one_hot {"patch": {category: feature name}, "region": {...}}, the same layout LolPredictor and the bundle use
+    def __init__(self, label_classes, one_hot):
+        self.label_classes = label_classes
+        self.one_hot = one_hot
+
+    # fitted like the notebook, sorted classes for the label encoders and the first category dropped for the one hot ones
+    @classmethod
+    def fit(cls, team_rows):
+        def classes(column):
+            return np.asarray(pd.Categorical(team_rows[column]).remove_unused_categories().categories, dtype=object)
+
+        def one_hot(column, prefix):
+            categories = classes(column).tolist()
+            return {categories[0]: None, **{category: f"{prefix}_{category}" for category in categories[1:]}}
+
+        label_classes = {
+            "team": classes("Team"),
+            "player": {f"{role}_player": classes(f"{role}_player") for role in ROLES},
+            "champion": {f"{role}_champion": classes(f"{role}_champion") for role in ROLES}
+        }
+        return cls(label_classes, {"patch": one_hot("Patch", "Patch"), "region": one_hot("Region", "Region")})
+
+    @classmethod
+    def from_pickles(cls, models_path="models"):
+        def load(file_name):
+            return joblib.load(os.path.join(models_path, file_name))
+
+        label_classes = {
+            "team": load("team_encoder.pkl").classes_,
+            "player": {column: encoder.classes_ for column, encoder in load("player_encoders.pkl").items()},
+            "champion": {column: encoder.classes_ for column, encoder in load("champion_encoders.pkl").items()}
+        }
+        one_hot = {
+            "patch": one_hot_features(load("patch_encoder.pkl"), "Patch"),
+            "region": one_hot_features(load("region_encoder.pkl"), "Region")
+        }
+        return cls(label_classes, one_hot)
+
+    # sklearn encoders equivalent to these, for the pickles the notebook used to write
+    def to_sklearn(self):
+        from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+
+        def label_encoder(classes):
+            encoder = LabelEncoder()
+            encoder.classes_ = np.asarray(classes, dtype=object)
+            return encoder
+
+        def one_hot_encoder(features, prefix):
+            return OneHotEncoder(sparse_output=False, drop="first").fit(pd.DataFrame({prefix: list(features)}))
+
+        return {
+            "champion": {column: label_encoder(classes) for column, classes in self.label_classes["champion"].items()},
+            "player": {column: label_encoder(classes) for column, classes in self.label_classes["player"].items()},
+            "team": label_encoder(self.label_classes["team"]),
+            "region": one_hot_encoder(self.one_hot["region"], "Region"),
+            "patch": one_hot_encoder(self.one_hot["patch"], "Patch")
+        }
+
+    # {path: sklearn encoder} of the encoder pickles LolPredictor and the notebooks load
+    def pickles(self, models_path="models"):
+        encoders = self.to_sklearn()
+        return {
+            os.path.join(models_path, file_name): encoders[name]
+            for name, file_name in [("champion", "champion_encoders.pkl"), ("player", "player_encoders.pkl"), ("team", "team_encoder.pkl"),
+                                    ("region", "region_encoder.pkl"), ("patch", "patch_encoder.pkl")]
+        }
+
+    def save_pickles(self, models_path="models"):
+        for path, encoder in self.pickles(models_path).items():
+            joblib.dump(encoder, path)
+
+    # codes of a column against fixed classes, with extend unseen names are appended so earlier codes never change
+    def label_codes(self, values, classes, extend):
+        codes = pd.Categorical(values, categories=classes).codes
+        unseen = codes < 0
+        if unseen.any():
+            if not extend:
+                raise ValueError(f"y contains previously unseen labels: {sorted(set(np.asarray(values)[unseen]))}")
+            classes = np.concatenate([classes, np.asarray(sorted(set(np.asarray(values)[unseen])), dtype=object)])
+            codes = pd.Categorical(values, categories=classes).codes
+        return codes.astype(np.int64), classes
+
+    # one hot columns of a column as {feature name: 0/1 floats}, the dropped category has no column
+    def one_hot_columns(self, name, values, extend):
+        features = self.one_hot[name]
+        categories = list(features)
+        codes = pd.Categorical(values, categories=categories).codes
+        if (codes < 0).any():
+            # regions stay fixed, every region needs a base elo
+            if not extend or name == "region":
+                raise ValueError(f"Found unknown categories {sorted(set(np.asarray(values)[codes < 0]))} in column 0 during transform")
+            prefix = name.capitalize()
+            for category in sorted(set(np.asarray(values)[codes < 0])):
+                features[category] = f"{prefix}_{category}"
+            categories = list(features)
+            codes = pd.Categorical(values, categories=categories).codes
+        matrix = np.zeros((len(codes), len(categories)))
+        matrix[np.arange(len(codes)), codes] = 1.0
+        return {feature: matrix[:, i] for i, feature in enumerate(features.values()) if feature is not None}
+
+    # normalized team rows with every name encoded, the columns in the order the notebook left them
+    def encode(self, team_rows, extend=False):
+        columns = {}
+        for column in team_rows.columns:
+            if column == "Team":
+                columns[column], self.label_classes["team"] = self.label_codes(team_rows[column], self.label_classes["team"], extend)
+            elif column.endswith(("_player", "_champion")):
+                kind = column.rsplit("_", 1)[1]
+                columns[column], self.label_classes[kind][column] = self.label_codes(team_rows[column], self.label_classes[kind][column], extend)
+            elif column not in ("Patch", "Region"):
+                columns[column] = team_rows[column].to_numpy()
+        columns.update(self.one_hot_columns("patch", team_rows["Patch"], extend))
+        columns.update(self.one_hot_columns("region", team_rows["Region"], extend))
+        return pd.DataFrame(columns)
+
+
+# test_models.ipynb: one row per game with the game columns once and each team's columns prefixed by its side
+def pivot_sides(encoded):
+    region_columns = [column for column in encoded.columns if column.startswith("Region_")]
+    patch_columns = [column for column in encoded.columns if column.startswith("Patch_")]
+    game_columns = GAME_LEVEL_COLUMNS + region_columns + patch_columns
+    team_columns = [column for column in encoded.columns if column not in game_columns]
+
+    side = encoded["Side"].to_numpy()
+    game_ids = encoded["GameID"].to_numpy()
+    rows = {"blue": np.flatnonzero(side == 1), "red": np.flatnonzero(side == 0)}
+    # both sides in GameID order so row i of each is the same game
+    for name in SIDES:
+        rows[name] = rows[name][np.argsort(game_ids[rows[name]], kind="stable")]
+    if len(rows["blue"]) != len(rows["red"]) or (game_ids[rows["blue"]] != game_ids[rows["red"]]).any():
+        raise ValueError("Every game needs exactly one blue and one red team row")
+
+    columns = {column: encoded[column].to_numpy()[rows["blue"]] for column in game_columns}
+    for name in SIDES:
+        for column in team_columns:
+            columns[f"{name}_{column}"] = encoded[column].to_numpy()[rows[name]]
+    return pd.DataFrame(columns)
+
+
+# the processed_historical_data.csv layout, each side's historical averages and elo follow its team columns
+def processed_frame(games, history, elo_after):
+    columns = {column: games[column] for column in games.columns if not column.startswith(tuple(f"{side}_" for side in SIDES))}
+    for i, side in enumerate(SIDES):
+        columns.update({column: games[column] for column in games.columns if column.startswith(f"{side}_")})
+        for role in ROLES:
+            for stat in STAT_COLUMNS:
+                column = f"{side}_{role}_historical_avg_{stat}"
+                columns[column] = history[column]
+        columns[f"{side}_team_elo_rating"] = elo_after[:, i]
+    return pd.DataFrame(columns)
+
+
+# the model inputs and the blue_Result target of processed rows
+def model_features(processed, feature_columns=None):
+    if feature_columns is None:
+        dropped = set(in_game_columns())
+        feature_columns = [column for column in processed.columns if column != "blue_Result" and column not in dropped]
+    return processed[feature_columns], processed["blue_Result"]
+
+
+class FeaturePipeline:
+    def __init__(self, encoders, elo, player_stats):
+        self.encoders = encoders
+        self.elo = elo
+        self.player_stats = player_stats
+
+    # every game from scratch, encoders are fitted on the rows unless given, returns the pipeline and the processed rows
+    @classmethod
+    def build(cls, team_rows, encoders=None):
+        team_rows = normalize(team_rows)
+        if encoders is None:
+            encoders = Encoders.fit(team_rows)
+        games = pivot_sides(encoders.encode(team_rows))
+        player_stats, history = PlayerStats.from_games(games, ROLES, STAT_COLUMNS)
+        elo, _, _, elo_after = EloRatings.from_processed(games)
+        return cls(encoders, elo, player_stats), processed_frame(games, history, elo_after)
+
+    # processes only new games, they have to come after every game already in the pipeline
+    # new teams, players, champions and patches get new codes, codes of known ones never change
+    def update(self, team_rows):
+        last_game_id = self.elo.last_game_id
+        if last_game_id is not None and (team_rows["GameID"] <= last_game_id).any():
+            raise ValueError(f"New games have to come after game {last_game_id}, use replay for games that don't")
+        games = pivot_sides(self.encoders.encode(normalize(team_rows), extend=True))
+
+        players = {side: {role: games[f"{side}_{role}_player"].to_numpy() for role in ROLES} for side in SIDES}
+        values = {side: {role: games[[f"{side}_{role}_{stat}" for stat in STAT_COLUMNS]].to_numpy(dtype=np.float64) for role in ROLES} for side in SIDES}
+        history = {f"{side}_{role}_historical_avg_{stat}": np.empty(len(games)) for side in SIDES for role in ROLES for stat in STAT_COLUMNS}
+        elo_after = np.empty((len(games), 2))
+        regions = game_regions(games)
+
+        # elo and the running averages depend on every earlier game, but each game is O(1)
+        game_ids = games["GameID"].tolist()
+        blue_teams, red_teams = games["blue_Team"].tolist(), games["red_Team"].tolist()
+        blue_won = (games["blue_Result"] == 1).tolist()
+        for i, game_id in enumerate(game_ids):
+            elo_after[i] = self.elo.update(game_id, blue_teams[i], red_teams[i], blue_won[i], regions[i])
+            features = self.player_stats.add_game(
+                {side: {role: players[side][role][i] for role in ROLES} for side in SIDES},
+                {side: {role: values[side][role][i] for role in ROLES} for side in SIDES}
+            )
+            for side in SIDES:
+                for role in ROLES:
+                    for j, stat in enumerate(STAT_COLUMNS):
+                        history[f"{side}_{role}_historical_avg_{stat}"][i] = features[side][role]["historical_avg"][j]
+        return processed_frame(games, history, elo_after)
+
+    # for games that don't all come after the pipeline's last one, like retried games or rescrapes in a later run
+    # the new games replace processed rows of the same game, then elo and the averages are replayed over every game
+    # from the processed rows, so neither the raw rows of earlier games nor a full rebuild are needed
+    def replay(self, processed, team_rows):
+        games = pivot_sides(self.encoders.encode(normalize(team_rows), extend=True))
+        derived = tuple(f"_historical_avg_{stat}" for stat in STAT_COLUMNS) + ("_team_elo_rating",)
+        earlier = processed[~processed["GameID"].isin(games["GameID"])]
+        # new patches add one hot columns, earlier games get 0 in them
+        earlier = earlier[[column for column in earlier.columns if not column.endswith(derived)]].reindex(columns=games.columns, fill_value=0.0)
+        games = pd.concat([earlier, games], ignore_index=True).sort_values("GameID", kind="stable", ignore_index=True)
+        self.player_stats, history = PlayerStats.from_games(games, ROLES, STAT_COLUMNS)
+        self.elo, _, _, elo_after = EloRatings.from_processed(games)
+        return processed_frame(games, history, elo_after)
+
+    # written to a temporary file and swapped in so a crash never leaves a half written state
+    def save(self, path=PIPELINE_PATH):
+        joblib.dump(self, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load(path=PIPELINE_PATH):
+        return joblib.load(path)
+
+
+# writes the processed csv, the pipeline state and, with models_path, the encoder and final elo pickles
+# everything goes to temporary files first and is swapped in together, so the csv never holds codes that the
+# pickles next to it don't know
+def write_outputs(processed, pipeline, output, state, models_path=None):
+    writes = [(output, lambda path: processed.to_csv(path, index=False)), (state, lambda path: joblib.dump(pipeline, path))]
+    if models_path is not None:
+        for pickle_path, encoder in pipeline.encoders.pickles(models_path).items():
+            writes.append((pickle_path, lambda path, encoder=encoder: joblib.dump(encoder, path)))
+        # keyed by np.int64 like the notebook's pickle
+        final_team_elos = {np.int64(team): rating for team, rating in pipeline.elo.final_team_elos().items()}
+        writes.append((os.path.join(models_path, "final_team_elos.pkl"), lambda path: joblib.dump(final_team_elos, path)))
+    for path, write in writes:
+        write(path + ".tmp")
+    for path, _ in writes:
+        os.replace(path + ".tmp", path)
+
+
+# the predictor reads the pickles and csv from their default paths, so the bundle is only re-exported from those
+def reexport_bundle(path="models/bundle"):
+    import bundle
+    from predictor import LolPredictor
+    if not bundle.bundle_exists(path):
+        return None
+    return bundle.export_bundle(LolPredictor(bundle_path=None), path)
+
+
+def open_store(path):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    from match_store import MatchStore
+    return MatchStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="process every game from scratch")
+    build_parser.add_argument("--history", default=HISTORY_PATH, help="team rows csv written by data/teammatchhistory.ipynb")
+    build_parser.add_argument("--store", help="build from the player rows in a match store instead of --history")
+    build_parser.add_argument("--refit", action="store_true", help="fit new encoders instead of using the ones in models/")
+    build_parser.add_argument("--export-pickles", action="store_true", help="rewrite the encoder and final elo pickles in --models")
+    # the new games can bring new teams, players and champions, their codes have to reach the pickles with the csv
+    update_parser = subparsers.add_parser("update", help="append the games scraped since the last update, rewriting the pickles in --models")
+    update_parser.add_argument("--store", default="data/match_stats.sqlite")
+    for subparser in [build_parser, update_parser]:
+        subparser.add_argument("--consumer", default="features", help="checkpoint name in the match store")
+        subparser.add_argument("--output", default=PROCESSED_PATH)
+        subparser.add_argument("--state", default=PIPELINE_PATH)
+        subparser.add_argument("--models", default="models", help="folder of the encoder and final elo pickles")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.store:
+            store = open_store(args.store)
+            last_seq = store.last_seq()
+            team_rows = team_games(store.read_frame())
+        else:
+            team_rows = pd.read_csv(args.history, dtype={"Patch": str}, keep_default_na=False)
+        encoders = None if args.refit else Encoders.from_pickles(args.models)
+        pipeline, processed = FeaturePipeline.build(team_rows, encoders)
+        write_outputs(processed, pipeline, args.output, args.state, args.models if args.export_pickles else None)
+        # later updates start after the games this build read
+        if args.store:
+            store.commit_checkpoint(args.consumer, last_seq)
+            store.close()
+        print(f"Processed {len(processed)} games into {args.output}")
+        return
+
+    pipeline = FeaturePipeline.load(args.state)
+    store = open_store(args.store)
+    player_rows, last_seq = store.new_since_checkpoint(args.consumer)
+    if len(player_rows):
+        team_rows = team_games(player_rows)
+        # dates parsed like normalize does, so old and new rows are written the same way
+        processed = pd.read_csv(args.output, parse_dates=["Date"])
+        last_game_id = pipeline.elo.last_game_id
+        if last_game_id is not None and (team_rows["GameID"] <= last_game_id).any():
+            processed = pipeline.replay(processed, team_rows)
+            print(f"Games at or before game {last_game_id} came in, replayed elo and player averages over all {len(processed)} games")
+        else:
+            new_rows = pipeline.update(team_rows)
+            # new patches add one hot columns, earlier games get 0 in them
+            processed = pd.concat([processed.reindex(columns=new_rows.columns, fill_value=0.0), new_rows], ignore_index=True)
+            print(f"Added {len(new_rows)} games, {len(processed)} in {args.output}")
+        write_outputs(processed, pipeline, args.output, args.state, args.models)
+        if args.output == PROCESSED_PATH and args.models == "models":
+            manifest = reexport_bundle()
+            if manifest is not None:
+                print(f"Re-exported bundle version {manifest['version']}")
+    else:
+        print("No new games")
+    store.commit_checkpoint(args.consumer, last_seq)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# serving versions of the fitted pipelines, taken apart once at load time so predict_proba skips sklearn's
+# per call input validation and the VotingClassifier dispatch. the scaler and elastic net become numpy arithmetic
+# and xgboost is called straight through Booster.inplace_predict, with the same operations in the same order
+# as sklearn so the probabilities match it. compile_model returns anything it doesn't know unchanged
+# sklearn, scipy and xgboost are imported when a model is compiled, by then unpickling it has loaded them anyway,
+# so importing this module (and LolPredictor) stays cheap
+import numpy as np
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class CompiledScaler:
+    def __init__(self, scaler):
+        self.mean = scaler.mean_ if scaler.with_mean else None
+        self.scale = scaler.scale_ if scaler.with_std else None
+
+    def transform(self, features):
+        # a copy like StandardScaler.transform, the caller's matrix is never changed
+        features = np.array(features, dtype=np.float64)
+        if self.mean is not None:
+            features -= self.mean
+        if self.scale is not None:
+            features /= self.scale
+        return features
+
+
+class CompiledLogisticRegression:
+    def __init__(self, classifier):
+        from scipy.special import expit
+
+        # a multinomial fit scores two classes with softmax instead
+        if len(classifier.classes_) != 2 or classifier.multi_class == "multinomial":
+            raise _Unsupported
+        self.coef = classifier.coef_.T
+        self.intercept = classifier.intercept_
+        self.expit = expit
+
+    def predict_proba(self, features):
+        # decision_function then expit, as LogisticRegression does for two classes
+        probs = (features @ self.coef + self.intercept).ravel()
+        self.expit(probs, out=probs)
+        return np.vstack([1 - probs, probs]).T
+
+
+class CompiledXGBClassifier:
+    def __init__(self, classifier):
+        if classifier.objective != "binary:logistic":
+            raise _Unsupported
+        self.booster = classifier.get_booster()
+        self.iteration_range = classifier._get_iteration_range(None)
+        self.missing = classifier.missing
+
+    def predict_proba(self, features):
+        probs = self.booster.inplace_predict(features, iteration_range=self.iteration_range, predict_type="value", missing=self.missing, validate_features=False)
+        return np.vstack((1 - probs, probs)).T
+
+
+class CompiledVotingClassifier:
+    def __init__(self, classifier):
+        if classifier.voting != "soft":
+            raise _Unsupported
+        self.estimators = [compile_estimator(estimator) for estimator in classifier.estimators_]
+        self.weights = classifier._weights_not_none
+
+    def predict_proba(self, features):
+        return np.average(np.asarray([estimator.predict_proba(features) for estimator in self.estimators]), axis=0, weights=self.weights)
+
+
+def compile_estimator(estimator):
+    from sklearn.ensemble import VotingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    if isinstance(estimator, StandardScaler):
+        return CompiledScaler(estimator)
+    if isinstance(estimator, LogisticRegression):
+        return CompiledLogisticRegression(estimator)
+    if isinstance(estimator, VotingClassifier):
+        return CompiledVotingClassifier(estimator)
+    try:
+        import xgboost as xgb
+    except ImportError:
+        raise _Unsupported from None
+    if isinstance(estimator, xgb.XGBClassifier):
+        return CompiledXGBClassifier(estimator)
+    raise _Unsupported
+
+
+class CompiledModel:
+    # predict_proba on a float64 matrix with the columns in feature_columns order
+    def __init__(self, model, transformers, classifier, feature_columns):
+        self.sklearn_model = model
+        self.transformers = transformers
+        self.classifier = classifier
+        self.feature_columns = list(feature_columns)
+
+    def predict_proba(self, features):
+        for transformer in self.transformers:
+            features = transformer.transform(features)
+        return self.classifier.predict_proba(features)
+
+
+# a CompiledModel for scaler + logistic regression / soft voting / xgboost pipelines, otherwise the model itself
+# feature_columns is the order the caller builds its matrix in, it has to be the order the model was fitted on
+def compile_model(model, feature_columns):
+    from sklearn.pipeline import Pipeline
+
+    fitted_columns = getattr(model, "feature_names_in_", None)
+    if fitted_columns is not None and list(fitted_columns) != list(feature_columns):
+        return model
+    steps = [step for _, step in model.steps if step is not None and step != "passthrough"] if isinstance(model, Pipeline) else [model]
+    try:
+        transformers = [compile_estimator(step) for step in steps[:-1]]
+        classifier = compile_estimator(steps[-1])
+        if not all(isinstance(transformer, CompiledScaler) for transformer in transformers) or isinstance(classifier, CompiledScaler):
+            return model
+        return CompiledModel(model, transformers, classifier, feature_columns)
+    except _Unsupported:
+        return model
@@ -0,0 +1,171 @@
+# optional timing for the hot paths: LolPredictor loading and predicting, StatsScraper fetching and parsing
+# code wraps each stage in instruments.span(name), which times it into a latency histogram and calls the callbacks,
+# and bumps counters with instruments.count(name). while disabled span hands back one shared no op context manager
+# and count returns straight away, so instrumented code costs about a method call per stage
+#   instruments = Instruments(enabled=True)
+#   predictor = LolPredictor(instruments=instruments)
+#   instruments.snapshot() / print(instruments.exposition())
+import bisect
+import math
+import re
+import threading
+import time
+
+# upper bounds in seconds, the last bucket catches everything slower
+DEFAULT_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    # estimated from the buckets the way prometheus does, interpolating inside the bucket the quantile falls in
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if self.buckets[i] != math.inf else self.max
+                # the observed extremes are tighter than the bucket edges
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": [[bound, count] for bound, count in zip(self.buckets, self.counts)]
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("instruments", "name", "attributes", "start")
+
+    def __init__(self, instruments, name, attributes):
+        self.instruments = instruments
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.instruments.observe(self.name, time.perf_counter() - self.start, self.attributes, failed=exc_type is not None)
+        return False
+
+
+class Instruments:
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    # callback(name, seconds, attributes) runs after every finished span, e.g. to log slow stages or forward them
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    # times the block into the histogram called name, attributes only go to the callbacks
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, attributes)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # spans that raise are still timed and also counted as "<name>.errors"
+    def observe(self, name, seconds, attributes=None, failed=False):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if failed:
+                self.counters[f"{name}.errors"] = self.counters.get(f"{name}.errors", 0) + 1
+        for callback in self.callbacks:
+            callback(name, seconds, attributes or {})
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "spans": {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+            }
+
+    # prometheus text format, counters as lol_<name>_total and every span in the lol_span_seconds histogram
+    def exposition(self, prefix="lol"):
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        if snapshot["spans"]:
+            metric = f"{prefix}_span_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, histogram in snapshot["spans"].items():
+                cumulative = 0
+                for bound, count in histogram["buckets"]:
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {histogram["sum"]!r}')
+                lines.append(f'{metric}_count{{span="{name}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
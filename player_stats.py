@@ -0,0 +1,154 @@
+# running per (role, player) counts and sums of the player stats, optionally with exponentially decayed means
+# the same state serves the notebook's point in time *_historical_avg_* features (average of the player's earlier
+# games, or the game's own value for a first game) while games stream in, and the current averages LolPredictor uses
+# players are label encoded ints, so every table is a numpy array indexed by the encoded player
+import numpy as np
+
+SIDES = ["blue", "red"]
+ROLES = ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]
+STAT_COLUMNS = ["kills", "deaths", "assists", "kp%", "dmg%", "gd@15"]
+
+
+class PlayerStats:
+    # alpha turns on exponentially decayed means, e.g. alpha=0.1 weighs a player's last game 10% of the mean
+    def __init__(self, roles, stats, alpha=None):
+        self.roles = list(roles)
+        self.stats = list(stats)
+        self.alpha = alpha
+        self.tables = {role: self.empty_tables(0) for role in self.roles}
+        # per side totals of every row, their average is the fallback for players without games
+        self.side_counts = {role: {side: 0 for side in SIDES} for role in self.roles}
+        self.side_sums = {role: {side: np.zeros(len(self.stats)) for side in SIDES} for role in self.roles}
+
+    def empty_tables(self, player_count):
+        tables = {"counts": np.zeros(player_count, dtype=np.int64), "sums": np.zeros((player_count, len(self.stats)))}
+        if self.alpha is not None:
+            tables["decayed_sums"] = np.zeros((player_count, len(self.stats)))
+            tables["decayed_weights"] = np.zeros(player_count)
+        return tables
+
+    # grows the tables of a role so every player id up to player fits, doubling to keep appends amortized O(1)
+    def reserve(self, role, player):
+        tables = self.tables[role]
+        if player < len(tables["counts"]):
+            return
+        grown = self.empty_tables(max(player + 1, 2 * len(tables["counts"])))
+        for name, table in tables.items():
+            grown[name][:len(table)] = table
+        self.tables[role] = grown
+
+    # adds one player's stats from one game and returns the point in time features for that game
+    # {"historical_avg": average of the earlier games or values itself for a first game, "decayed_avg": same for the decayed mean}
+    def add(self, role, side, player, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.reserve(role, player)
+        tables = self.tables[role]
+
+        count = tables["counts"][player]
+        features = {"historical_avg": tables["sums"][player] / count if count else values.copy()}
+        tables["counts"][player] += 1
+        tables["sums"][player] += values
+
+        if self.alpha is not None:
+            weight = tables["decayed_weights"][player]
+            features["decayed_avg"] = tables["decayed_sums"][player] / weight if weight else values.copy()
+            tables["decayed_sums"][player] = tables["decayed_sums"][player] * (1 - self.alpha) + values
+            tables["decayed_weights"][player] = weight * (1 - self.alpha) + 1
+
+        self.side_counts[role][side] += 1
+        self.side_sums[role][side] += values
+        return features
+
+    # streams one game in, players is {side: {role: player}} and values {side: {role: stats}}
+    def add_game(self, players, values):
+        return {side: {role: self.add(role, side, players[side][role], values[side][role]) for role in self.roles} for side in SIDES}
+
+    # role average used for players without games, the average of the blue and red averages like the notebook
+    def fallback(self, role):
+        return sum(self.side_sums[role][side] / self.side_counts[role][side] for side in SIDES) / len(SIDES)
+
+    # current averages for a list of players as one row per player, players without games get the fallback
+    def current(self, role, players, decayed=False):
+        players = np.asarray(players, dtype=np.int64)
+        if len(players):
+            self.reserve(role, players.max())
+        tables = self.tables[role]
+        if decayed:
+            totals, weights = tables["decayed_sums"], tables["decayed_weights"]
+        else:
+            totals, weights = tables["sums"], tables["counts"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = totals[players] / weights[players][:, None]
+        return np.where((tables["counts"][players] > 0)[:, None], means, self.fallback(role))
+
+    # the tables LolPredictor and the bundle use, sized to player_count players
+    def predictor_tables(self, role, player_count):
+        self.reserve(role, player_count - 1)
+        counts = self.tables[role]["counts"][:player_count].copy()
+        sums = self.tables[role]["sums"][:player_count].copy()
+        # players without games get a nan mean and fall back to the role average
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts[:, None]
+        return {"counts": counts, "sums": sums, "means": means, "fallback": self.fallback(role)}
+
+    # replays every game of a blue/red frame (processed_historical_data.csv layout) in one vectorized pass
+    # returns the state plus the point in time features of every row as {feature column: array in df order}
+    @classmethod
+    def from_games(cls, df, roles, stats, alpha=None):
+        import pandas as pd
+
+        state = cls(roles, stats, alpha)
+        # games are replayed in GameID order with blue before red, a stable sort keeps the frame order for equal ids
+        order = np.argsort(df["GameID"].to_numpy(), kind="stable")
+        replay_rows = {side: 2 * np.argsort(order, kind="stable") + i for i, side in enumerate(SIDES)}
+        features = {}
+
+        for role in state.roles:
+            columns = {side: [f"{side}_{role}_{stat}" for stat in state.stats] for side in SIDES}
+            players = {side: df[f"{side}_{role}_player"].to_numpy(dtype=np.int64) for side in SIDES}
+            values = {side: df[columns[side]].to_numpy(dtype=np.float64) for side in SIDES}
+
+            # one long row per (game, side) in replay order
+            long = pd.DataFrame(np.stack([values[side][order] for side in SIDES], axis=1).reshape(-1, len(state.stats)), columns=state.stats)
+            long_players = pd.Series(np.stack([players[side][order] for side in SIDES], axis=1).reshape(-1))
+            grouped = long.groupby(long_players, sort=False)
+
+            # expanding sums of each player's earlier games, no per group python code
+            earlier_counts = grouped.cumcount().to_numpy()
+            earlier_sums = grouped.cumsum().groupby(long_players, sort=False).shift(1).to_numpy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where((earlier_counts > 0)[:, None], earlier_sums / earlier_counts[:, None], long.to_numpy())
+            point_in_time = {"historical_avg": means}
+
+            if alpha is not None:
+                decayed = grouped.ewm(alpha=alpha).mean().droplevel(0).sort_index()
+                # the decayed mean going into a game is the one after the player's previous game
+                earlier = decayed.groupby(long_players, sort=False).shift(1).to_numpy()
+                point_in_time["decayed_avg"] = np.where(np.isnan(earlier), long.to_numpy(), earlier)
+
+                # closed form of the weights the streaming update accumulates, and the last decayed mean per player
+                player_count = long_players.max() + 1
+                state.reserve(role, player_count - 1)
+                counts = np.bincount(long_players, minlength=player_count)
+                last = decayed.groupby(long_players).last()
+                weights = (1 - (1 - alpha) ** counts) / alpha
+                state.tables[role]["decayed_weights"][:player_count] = weights
+                state.tables[role]["decayed_sums"][last.index.to_numpy()] = last.to_numpy() * weights[last.index.to_numpy(), None]
+
+            for side in SIDES:
+                for name, table in point_in_time.items():
+                    for j, stat in enumerate(state.stats):
+                        features[f"{side}_{role}_{name}_{stat}"] = table[replay_rows[side], j]
+
+            # totals summed blue rows then red rows in frame order, the order LolPredictor always used
+            all_players = np.concatenate([players[side] for side in SIDES])
+            all_values = np.concatenate([values[side] for side in SIDES])
+            player_count = all_players.max() + 1
+            state.reserve(role, player_count - 1)
+            state.tables[role]["counts"][:player_count] = np.bincount(all_players, minlength=player_count)
+            for j in range(len(state.stats)):
+                state.tables[role]["sums"][:player_count, j] = np.bincount(all_players, weights=all_values[:, j], minlength=player_count)
+            for side in SIDES:
+                state.side_counts[role][side] = len(values[side])
+                state.side_sums[role][side] = values[side].sum(axis=0)
+        return state, features
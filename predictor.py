@@ -1,178 +1,481 @@
-import pandas as pd
+import os
+import hashlib
+
+import numpy as np
 import joblib
 
+import bundle
+from cache import match_cache_key
+from inference import compile_model
+from instrumentation import Instruments
+from player_stats import ROLES, STAT_COLUMNS, PlayerStats
+from registry import ModelRegistry
+
+BUNDLE_PATH = "models/bundle"
+# columns of df_original needed after load, kept so the bundle can ship them without the full csv
+GAME_COLUMNS = ["GameID", "Date", "blue_Team", "red_Team"] + [f"{side}_{role}_player" for side in ["blue", "red"] for role in ROLES]
+# "compiled" serves the models through inference.compile_model, "sklearn" calls the fitted pipelines directly
+BACKENDS = ("compiled", "sklearn")
+ENCODER_PATHS = [
+    "models/champion_encoders.pkl", "models/player_encoders.pkl", "models/team_encoder.pkl",
+    "models/region_encoder.pkl", "models/patch_encoder.pkl"
+]
+MODEL_PATHS = {
+    "voting": "models/voting_ensemble_model.pkl",
+    "elastic": "models/elastic_net_model.pkl"
+}
+# every file load_pickles reads, the bundle records their hashes so a bundle older than them isn't used
+SOURCE_PATHS = ENCODER_PATHS + list(MODEL_PATHS.values()) + ["models/final_team_elos.pkl", "models/feature_columns.pkl", "data/processed_historical_data.csv"]
+
+
+# version for artifacts loaded straight from the pickles, changes whenever a file is rewritten
+def source_version(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
 class LolPredictor:
-    def __init__(self):
+    def __init__(self, bundle_path=BUNDLE_PATH, warm_up=False, cache=None, backend="compiled", instruments=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        self.backend = backend
+        # set bundle_path to None to always load from the pickles and csv
+        self.bundle_path = bundle_path
+        # optional cache.PredictionCache for results of named models
+        self.cache = cache
+        # instrumentation.Instruments timing the load and predict stages, off unless one is passed in enabled
+        self.instruments = instruments if instruments is not None else Instruments()
         self.load_data()
+        # start unpickling the models in the background so the first prediction doesn't wait on them
+        if warm_up:
+            self.registry.warm_up(background=True)
 
-    # load encoders, models and model inputs
+    # load encoders, models and model inputs, from the exported bundle when there is one that is up to date
     def load_data(self):
-        self.encoders = {
-            "champion": joblib.load("models/champion_encoders.pkl"),
-            "player": joblib.load("models/player_encoders.pkl"),
-            "team": joblib.load("models/team_encoder.pkl"),
-            "region": joblib.load("models/region_encoder.pkl"),
-            "patch": joblib.load("models/patch_encoder.pkl")
-        }
+        span = self.instruments.span
+        use_bundle = self.bundle_path is not None and bundle.bundle_exists(self.bundle_path)
+        if use_bundle:
+            with span("load.check_sources"):
+                changed = bundle.changed_sources(self.bundle_path)
+            # retraining and features.py build --export-pickles rewrite the sources, features.py update re-exports the bundle itself
+            if changed:
+                print(f"{', '.join(changed)} changed since {self.bundle_path} was exported, loading the pickles instead. Re-export it with python bundle.py")
+                use_bundle = False
+        if use_bundle:
+            with span("load.bundle"):
+                self.load_bundle()
+        else:
+            with span("load.pickles"):
+                self.load_pickles()
+        with span("load.encoder_lookups"):
+            self.build_encoder_lookups()
+        with span("load.feature_layout"):
+            self.build_feature_layout()
+        with span("load.roster_index"):
+            self.build_roster_index()
+        with span("load.metadata"):
+            self.build_metadata()
+
+        # models are registered by name and only loaded the first time they are used
+        self.registry = ModelRegistry(loader=self.load_model)
+        for name, path in self.model_paths.items():
+            self.registry.register(name, path)
+
+    def load_pickles(self):
+        # pandas is only needed for the csv and at the model boundary
+        import pandas as pd
+
+        from features import Encoders
+
+        # the same encoders features.py builds the training rows with
+        encoders = Encoders.from_pickles()
         self.final_team_elos = joblib.load("models/final_team_elos.pkl")
         self.feature_columns = joblib.load("models/feature_columns.pkl")
-        self.voting_model = joblib.load("models/voting_ensemble_model.pkl")
-        self.elastic_model = joblib.load("models/elastic_net_model.pkl")
+        self.model_paths = dict(MODEL_PATHS)
         self.df_original = pd.read_csv("data/processed_historical_data.csv")
-        
+        self.artifact_version = source_version(SOURCE_PATHS)
+
+        self.label_classes = encoders.label_classes
+        self.one_hot_features = encoders.one_hot
+        self.games = {column: self.df_original[column].to_numpy() for column in GAME_COLUMNS}
+        self.build_player_stats_index()
+
+    # everything except the models is memory mapped from the bundle
+    def load_bundle(self):
+        artifacts = bundle.load_bundle(self.bundle_path)
+        self.artifact_version = artifacts["version"]
+        self.feature_columns = artifacts["feature_columns"]
+        self.model_paths = artifacts["model_paths"]
+        self.label_classes = artifacts["label_classes"]
+        self.one_hot_features = artifacts["one_hot_features"]
+        self.final_team_elos = artifacts["team_elos"]
+        self.player_stats = artifacts["player_stats"]
+        self.games = artifacts["games"]
+
+    def load_model(self, path):
+        with self.instruments.span("load.model", path=path):
+            model = joblib.load(path)
+            if self.backend == "compiled":
+                return compile_model(model, self.feature_columns)
+            return model
+
+    def get_model(self, name):
+        return self.registry.get(name)
+
+    @property
+    def voting_model(self):
+        return self.get_model("voting")
+
+    @property
+    def elastic_model(self):
+        return self.get_model("elastic")
+
+    # plain dict lookups from each label encoder's classes_ so the hot path skips sklearn's transform
+    def build_encoder_lookups(self):
+        self.label_lookups = {
+            "team": {label: i for i, label in enumerate(self.label_classes["team"].tolist())},
+            "player": {column: {label: i for i, label in enumerate(classes.tolist())} for column, classes in self.label_classes["player"].items()},
+            "champion": {column: {label: i for i, label in enumerate(classes.tolist())} for column, classes in self.label_classes["champion"].items()}
+        }
+
+    # encodes a list of names the same way LabelEncoder.transform does
+    def encode_labels(self, lookup, names):
+        try:
+            return [lookup[name] for name in names]
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e}") from None
+
+    # compile the feature layout once so feature rows are written straight into numpy arrays
+    def build_feature_layout(self):
+        self.feature_index = {column: i for i, column in enumerate(self.feature_columns)}
+
+        # map each one hot category to its column in the feature matrix (None if it has no column)
+        self.one_hot_index = {
+            name: {category: self.feature_index.get(feature_name) for category, feature_name in features.items()}
+            for name, features in self.one_hot_features.items()
+        }
+
+    # precompute per (role, player) sums, counts and means across both sides so lookups don't scan df_original
+    # games with codes past the encoders' classes come from a csv written with newer encoders than the pickles
+    def check_codes(self, games):
+        columns = [(f"{side}_Team", self.label_classes["team"]) for side in ["blue", "red"]]
+        columns += [(f"{side}_{role}_player", self.label_classes["player"][f"{role}_player"]) for side in ["blue", "red"] for role in ROLES]
+        for column, classes in columns:
+            codes = np.asarray(games[column])
+            if len(codes) and (codes.min() < 0 or codes.max() >= len(classes)):
+                raise ValueError(
+                    f"{column} has codes up to {codes.max()} but the encoders only know {len(classes)} names, the encoder "
+                    "pickles are older than the games. Rewrite them with python features.py build --export-pickles"
+                )
+
+    def build_player_stats_index(self):
+        self.check_codes(self.df_original)
+        self.player_stats = {}
+        history, _ = PlayerStats.from_games(self.df_original, ROLES, STAT_COLUMNS)
+        for role in ROLES:
+            self.player_stats[role] = history.predictor_tables(role, len(self.label_classes["player"][f"{role}_player"]))
+
     def get_player_historical_stats(self, player_name, role):
-        stat_columns = ["kills", "deaths", "assists", "kp%", "dmg%", "gd@15"]
-        historical_stats = {}
-        
-        # get all games for this player in this role (from both blue and red sides)
-        blue_player_col = f"blue_{role}_player"
-        red_player_col = f"red_{role}_player"
+        encoded_player = self.encode_labels(self.label_lookups["player"][f"{role}_player"], [player_name.lower()])[0]
+        return self.get_encoded_player_stats(encoded_player, role)
 
-        encoded_player = self.encoders["player"][f"{role}_player"].transform([player_name.lower()])[0]
-        blue_games = self.df_original[self.df_original[f"blue_{role}_player"] == encoded_player]
-        red_games = self.df_original[self.df_original[f"red_{role}_player"] == encoded_player]
-        
-        for stat in stat_columns:
-            blue_stat_col = f"blue_{role}_{stat}"
-            red_stat_col = f"red_{role}_{stat}"
-            
-            # combine stats from both blue and red games
-            all_stat_values = []
-            
-            if len(blue_games) > 0:
-                all_stat_values.extend(blue_games[blue_stat_col].tolist())
-            if len(red_games) > 0:
-                all_stat_values.extend(red_games[red_stat_col].tolist())
-            if len(all_stat_values) == 0:
-                # if no historical data use historical data
-                blue_avg = self.df_original[blue_stat_col].mean()
-                red_avg = self.df_original[red_stat_col].mean()
-                historical_stats[stat] = (blue_avg + red_avg) / 2
-            else:
-                # calculate player"s historical average
-                historical_stats[stat] = sum(all_stat_values) / len(all_stat_values)
-        
-        return historical_stats
+    # same as get_player_historical_stats but for an already encoded player
+    def get_encoded_player_stats(self, encoded_player, role):
+        return dict(zip(STAT_COLUMNS, self.player_stat_rows([encoded_player], role)[0].tolist()))
+
+    # historical averages for a list of encoded players as one row per player
+    def player_stat_rows(self, encoded_players, role):
+        stats = self.player_stats[role]
+        encoded_players = np.asarray(encoded_players, dtype=np.int64)
+        has_games = stats["counts"][encoded_players] > 0
+        # player"s historical average, or the role average if they have no games
+        return np.where(has_games[:, None], stats["means"][encoded_players], stats["fallback"])
 
     # gets their latest elo
     def get_team_elo(self, team_name):
-        encoded_team = self.encoders["team"].transform([team_name.lower()])[0]
+        encoded_team = self.encode_labels(self.label_lookups["team"], [team_name.lower()])[0]
         return self.final_team_elos[encoded_team]
 
-    
-    def predict_match(self, match_info, model):
-        prediction_data = {}
-        
-        # one hot encode the patch number
-        patch_df = pd.DataFrame({"Patch": [str(match_info["patch"])]})
-        patch_encoded = self.encoders["patch"].transform(patch_df)
-        patch_features = self.encoders["patch"].get_feature_names_out(["Patch"])
-        for i, feature_name in enumerate(patch_features):
-            prediction_data[feature_name] = patch_encoded[0][i]
-        
-        # one hot encode the region
-        region_df = pd.DataFrame({"Region": [match_info["region"].lower()]})
-        region_encoded = self.encoders["region"].transform(region_df)
-        region_features = self.encoders["region"].get_feature_names_out(["Region"])
-        for i, feature_name in enumerate(region_features):
-            prediction_data[feature_name] = region_encoded[0][i]
-        
-        # add team elo per team
-        prediction_data["blue_team_elo_rating"] = self.get_team_elo(match_info["blue_team"]["team_name"])
-        prediction_data["red_team_elo_rating"] = self.get_team_elo(match_info["red_team"]["team_name"])
-        
-        # encode teams, players and champions
-        for team_color in ["blue", "red"]:
-            team_data = match_info[f"{team_color}_team"]
-            prediction_data[f"{team_color}_Team"] = self.encoders["team"].transform([team_data["team_name"].lower()])[0]
-            
-            for role in ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]:
-                player_name = team_data["players"][role]
-                champion_name = team_data["champions"][role]
-
-                # encode players for each role
-                prediction_data[f"{team_color}_{role}_player"] = self.encoders["player"][f"{role}_player"].transform([player_name.lower()])[0]
-                # encode champions for each role
-                prediction_data[f"{team_color}_{role}_champion"] = self.encoders["champion"][f"{role}_champion"].transform([champion_name.lower()])[0]
-
-                # add historical average stats
-                historical_stats = self.get_player_historical_stats(player_name, role)
-                for stat, avg_value in historical_stats.items():
-                    prediction_data[f"{team_color}_{role}_historical_avg_{stat}"] = avg_value
-        
-        # create prediction dataframe and wrape prediction_data
-        pred_df = pd.DataFrame([prediction_data])
-        pred_df = pred_df.reindex(columns=self.feature_columns, fill_value=0.0)
-        
+    # one hot encodes a column of values into the feature matrix
+    def fill_one_hot(self, features, name, values):
+        one_hot_index = self.one_hot_index[name]
+        for row, value in enumerate(values):
+            if value not in one_hot_index:
+                raise ValueError(f"Found unknown categories [{value!r}] in column 0 during transform")
+            column = one_hot_index[value]
+            if column is not None:
+                features[row, column] = 1.0
+
+    # writes a column of values into the feature matrix, columns the models don't use are skipped
+    def fill_column(self, features, column_name, values):
+        column = self.feature_index.get(column_name)
+        if column is not None:
+            features[:, column] = values
+
+    # builds one feature row per match, each encoder runs once over the whole column
+    def build_feature_matrix(self, match_infos):
+        # columns that are never filled stay 0.0
+        features = np.zeros((len(match_infos), len(self.feature_columns)), dtype=np.float64)
+        encoded_players = {}
+
+        with self.instruments.span("features.encode"):
+            # one hot encode the patch numbers and regions
+            self.fill_one_hot(features, "patch", [str(match_info["patch"]) for match_info in match_infos])
+            self.fill_one_hot(features, "region", [match_info["region"].lower() for match_info in match_infos])
+
+            # encode teams, players and champions
+            for team_color in ["blue", "red"]:
+                teams_data = [match_info[f"{team_color}_team"] for match_info in match_infos]
+                encoded_teams = self.encode_labels(self.label_lookups["team"], [team_data["team_name"].lower() for team_data in teams_data])
+                self.fill_column(features, f"{team_color}_Team", encoded_teams)
+                # add team elo per team
+                self.fill_column(features, f"{team_color}_team_elo_rating", [self.final_team_elos[team] for team in encoded_teams])
+
+                for role in ROLES:
+                    player_names = [team_data["players"][role].lower() for team_data in teams_data]
+                    champion_names = [team_data["champions"][role].lower() for team_data in teams_data]
+
+                    # encode players for each role
+                    encoded_players[team_color, role] = self.encode_labels(self.label_lookups["player"][f"{role}_player"], player_names)
+                    self.fill_column(features, f"{team_color}_{role}_player", encoded_players[team_color, role])
+                    # encode champions for each role
+                    self.fill_column(features, f"{team_color}_{role}_champion", self.encode_labels(self.label_lookups["champion"][f"{role}_champion"], champion_names))
+
+        # add historical average stats
+        with self.instruments.span("features.player_stats"):
+            for (team_color, role), players in encoded_players.items():
+                historical_stats = self.player_stat_rows(players, role)
+                for i, stat in enumerate(STAT_COLUMNS):
+                    self.fill_column(features, f"{team_color}_{role}_historical_avg_{stat}", historical_stats[:, i])
+
+        return features
+
+    # the pipelines were fitted on a dataframe so only wrap the matrix when the model checks feature names
+    def model_input(self, model, features):
+        if hasattr(model, "feature_names_in_"):
+            import pandas as pd
+            return pd.DataFrame(features, columns=self.feature_columns, copy=False)
+        return features
+
+    # scores a list of matches, model is a registered name or a fitted model
+    # results for named models are served from the cache when one is set
+    def predict_many(self, match_infos, model):
+        self.instruments.count("predict.calls")
+        self.instruments.count("predict.matches", len(match_infos))
+        if self.cache is None or not isinstance(model, str):
+            return self.score_matches(match_infos, model)
+
+        with self.instruments.span("predict.cache_lookup"):
+            keys = [match_cache_key(match_info, model, self.artifact_version) for match_info in match_infos]
+            results = [self.cache.get(key) for key in keys]
+        # only the misses are scored, still with a single predict_proba call
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.instruments.count("predict.cache_hits", len(match_infos) - len(missing))
+        self.instruments.count("predict.cache_misses", len(missing))
+        if missing:
+            scored = self.score_matches([match_infos[i] for i in missing], model)
+            for i, result in zip(missing, scored):
+                self.cache.set(keys[i], result)
+                results[i] = result
+        return results
+
+    # scores a list of matches with a single predict_proba call
+    def score_matches(self, match_infos, model):
+        if not match_infos:
+            return []
+        return self.score_features(self.build_feature_matrix(match_infos), model)
+
+    # scores a list of matches with several named models, the features are built once and each model makes one predict_proba call
+    def score_models(self, match_infos, models=("voting", "elastic")):
+        if not match_infos:
+            return {name: [] for name in models}
+        features = self.build_feature_matrix(match_infos)
+        return {name: self.score_features(features, name) for name in models}
+
+    # like predict_many for several named models at once, returns {model: results}
+    # cached results are reused and the features of every match missing for any model are built once
+    def predict_models(self, match_infos, models=("voting", "elastic")):
+        self.instruments.count("predict.calls")
+        self.instruments.count("predict.matches", len(match_infos))
+        if self.cache is None:
+            return self.score_models(match_infos, models)
+
+        with self.instruments.span("predict.cache_lookup"):
+            keys = {name: [match_cache_key(match_info, name, self.artifact_version) for match_info in match_infos] for name in models}
+            results = {name: [self.cache.get(key) for key in keys[name]] for name in models}
+        missing = sorted({i for name in models for i, result in enumerate(results[name]) if result is None})
+        self.instruments.count("predict.cache_hits", len(match_infos) * len(models) - sum(result is None for name in models for result in results[name]))
+        self.instruments.count("predict.cache_misses", sum(result is None for name in models for result in results[name]))
+        if missing:
+            features = self.build_feature_matrix([match_infos[i] for i in missing])
+            for name in models:
+                rows = [row for row, i in enumerate(missing) if results[name][i] is None]
+                if not rows:
+                    continue
+                for row, result in zip(rows, self.score_features(features[rows], name)):
+                    i = missing[row]
+                    self.cache.set(keys[name][i], result)
+                    results[name][i] = result
+        return results
+
+    # results for rows already built by build_feature_matrix
+    def score_features(self, features, model):
+        if isinstance(model, str):
+            model = self.get_model(model)
+
         # make prediction and get probability of blue team winning
-        blue_win_prob = model.predict_proba(pred_df)[0][1]
-        # assign winner if win prob > 0.5
-        predicted_winner = "Blue" if blue_win_prob > 0.5 else "Red"
+        with self.instruments.span("predict.model_input"):
+            model_input = self.model_input(model, features)
+        with self.instruments.span("predict.predict_proba"):
+            blue_win_probs = model.predict_proba(model_input)[:, 1]
+
+        results = []
+        for blue_win_prob in blue_win_probs:
+            # assign winner if win prob > 0.5
+            predicted_winner = "Blue" if blue_win_prob > 0.5 else "Red"
+            results.append({
+                "predicted_winner": predicted_winner, "blue_win_probability": blue_win_prob
+            })
+        return results
+
+    def predict_match(self, match_info, model):
+        return self.predict_many([match_info], model)[0]
 
-        
-        return {
-            "predicted_winner": predicted_winner, "blue_win_probability": blue_win_prob
-        }
-    
-   
     def predict_voting(self, match_info):
-        return self.predict_match(match_info, self.voting_model)
+        return self.predict_match(match_info, "voting")
     
     def predict_elastic(self, match_info):
-        return self.predict_match(match_info, self.elastic_model)
+        return self.predict_match(match_info, "elastic")
+
+    def predict_voting_many(self, match_infos):
+        return self.predict_many(match_infos, "voting")
+
+    def predict_elastic_many(self, match_infos):
+        return self.predict_many(match_infos, "elastic")
+
+    # what if one side's player or champion in a role were different: scores every option with everything else kept
+    # options default to every champion of the role, or the team's roster for players
+    # returns [{"name": option, model: blue win probability, ...}] with the best option for that side first (by the first model)
+    def sweep(self, match_info, side, role, kind="champion", models=("voting", "elastic"), options=None):
+        if side not in ("blue", "red"):
+            raise ValueError(f"side must be 'blue' or 'red', got {side!r}")
+        if role not in ROLES:
+            raise ValueError(f"role must be one of {ROLES}, got {role!r}")
+        if kind not in ("champion", "player"):
+            raise ValueError(f"kind must be 'champion' or 'player', got {kind!r}")
+        if options is None:
+            if kind == "champion":
+                options = self.get_champions(role)
+            else:
+                options = self.get_team_players(match_info[f"{side}_team"]["team_name"])[role]
+        options = list(options)
+        if not options:
+            return []
+
+        # the shared features are built once and copied for every option, only the swept columns change
+        features = np.repeat(self.build_feature_matrix([match_info]), len(options), axis=0)
+        encoded = self.encode_labels(self.label_lookups[kind][f"{role}_{kind}"], [option.lower() for option in options])
+        self.fill_column(features, f"{side}_{role}_{kind}", encoded)
+        if kind == "player":
+            historical_stats = self.player_stat_rows(encoded, role)
+            for i, stat in enumerate(STAT_COLUMNS):
+                self.fill_column(features, f"{side}_{role}_historical_avg_{stat}", historical_stats[:, i])
+
+        # one predict_proba per model for the whole sweep
+        probabilities = {}
+        for name in models:
+            model = self.get_model(name)
+            probabilities[name] = model.predict_proba(self.model_input(model, features))[:, 1]
+
+        rows = [{"name": option, **{name: float(probabilities[name][i]) for name in models}} for i, option in enumerate(options)]
+        # highest win probability for the swept side first
+        sign = -1 if side == "blue" else 1
+        rows.sort(key=lambda row: sign * row[models[0]])
+        return rows
+
+    # team -> role -> player -> (last GameID, last Date) so roster lookups are dict reads
+    def build_roster_index(self):
+        self.roster_index = {}
+        self.roster_lists = {}
+        self.add_roster_games(self.games)
+
+    # adds games with the GAME_COLUMNS (teams and players encoded) to the roster index, e.g. after new games are ingested
+    def add_roster_games(self, games):
+        self.check_codes(games)
+        game_ids = list(games["GameID"])
+        dates = [str(date) for date in games["Date"]]
+        updated_teams = set()
+
+        for side in ["blue", "red"]:
+            teams = list(games[f"{side}_Team"])
+            for role in ROLES:
+                player_names = self.label_classes["player"][f"{role}_player"].tolist()
+                for team, player, game_id, date in zip(teams, games[f"{side}_{role}_player"], game_ids, dates):
+                    team = int(team)
+                    role_players = self.roster_index.setdefault(team, {team_role: {} for team_role in ROLES})[role]
+                    player_name = player_names[player]
+                    last_seen = role_players.get(player_name)
+                    if last_seen is None or game_id > last_seen[0]:
+                        role_players[player_name] = (int(game_id), date)
+                    updated_teams.add(team)
+
+        # sorted option lists are rebuilt only for the teams that changed
+        for team in updated_teams:
+            self.roster_lists[team] = {
+                "name": {role: sorted(players) for role, players in self.roster_index[team].items()},
+                "recent": {role: sorted(players, key=lambda p: (-players[p][0], p)) for role, players in self.roster_index[team].items()}
+            }
+
+    # get all players who have played for a specific team, sorted by name or with the most recently seen first
+    def get_team_players(self, team_name, order="name"):
+        encoded_team = self.encode_labels(self.label_lookups["team"], [team_name.lower()])[0]
+        if order not in ("name", "recent"):
+            raise ValueError(f"order must be 'name' or 'recent', got {order!r}")
+
+        team_players = self.roster_lists.get(encoded_team)
+        if team_players is None:
+            return {role: [] for role in ROLES}
+        # copies so callers can't change the index
+        return {role: list(players) for role, players in team_players[order].items()}
+
+    # date each player was last seen playing a role for the team
+    def get_team_players_last_seen(self, team_name):
+        encoded_team = self.encode_labels(self.label_lookups["team"], [team_name.lower()])[0]
+        team_roles = self.roster_index.get(encoded_team, {team_role: {} for team_role in ROLES})
+        return {role: {player: date for player, (_, date) in players.items()} for role, players in team_roles.items()}
+
+    # option lists for the ui are built once per load as tuples so reruns never rebuild or mutate them
+    def build_metadata(self):
+        patches = list(self.one_hot_features["patch"])
+        self.metadata = {
+            "teams": tuple(sorted(self.label_classes["team"].tolist())),
+            "champions": {role: tuple(sorted(self.label_classes["champion"][f"{role}_champion"].tolist())) for role in ROLES},
+            "players": {role: tuple(sorted(self.label_classes["player"][f"{role}_player"].tolist())) for role in ROLES},
+            # regions and patches include the default category that isn't one hot encoded
+            "regions": tuple(sorted(self.one_hot_features["region"])),
+            "patches": tuple(sorted(patches, key=lambda x: (int(str(x).split('.')[0]), int(str(x).split('.')[1]))))
+        }
 
     # get all teams
     def get_teams(self):
-        return sorted(self.encoders["team"].classes_)
+        return self.metadata["teams"]
 
     # get all champions for a specific role
     def get_champions(self, role):
-        return sorted(self.encoders["champion"][f"{role}_champion"].classes_)
+        return self.metadata["champions"][role]
             
     # get all players for a specific role
     def get_players(self, role):
-        return sorted(self.encoders["player"][f"{role}_player"].classes_)
+        return self.metadata["players"][role]
 
-    # get all players who have played for a specific team
-    def get_team_players(self, team_name):
-        encoded_team = self.encoders["team"].transform([team_name.lower()])[0]
-        team_players = {}
-        
-        for role in ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]:
-            # combine both blue and red games
-            blue_players = set(self.df_original[self.df_original["blue_Team"] == encoded_team][f"blue_{role}_player"])
-            red_players = set(self.df_original[self.df_original["red_Team"] == encoded_team][f"red_{role}_player"])
-            
-            all_players = blue_players | red_players
-            decoded_players = [self.encoders["player"][f"{role}_player"].inverse_transform([p])[0] for p in all_players]
-            team_players[role] = sorted(decoded_players)
-        
-        return team_players
     def get_regions(self):
-        # get regions from one hot encoded columns
-        region_columns = [col for col in self.df_original.columns if col.startswith('Region_')]
-        # default region not one hot encoded
-        regions = ['cn']
-        
-        # add regions that have been one-hot encoded
-        for col in region_columns:
-            region_name = col.replace('Region_', '')
-            regions.append(region_name)
-        
-        return sorted(regions)
+        return self.metadata["regions"]
 
     def get_patches(self):
-        # get patches from one hot encoded columns
-        patch_columns = [col for col in self.df_original.columns if col.startswith('Patch_')]
-        # default patch not one hot encoded
-        patches = ["15.1"]
-    
-        # add patches that have one hot columns
-        for col in patch_columns:
-            patch_str = col.replace('Patch_', '')
-            patches.append(patch_str)
-        sorted_patches = sorted(patches, key=lambda x: (int(str(x).split('.')[0]), int(str(x).split('.')[1])))
-        return sorted_patches
+        return self.metadata["patches"]
 
     def create_match_info(self, patch, region, blue_team, red_team):
         return {
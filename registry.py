@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import joblib
+
+
+# resident set size of this process in bytes, None where /proc isn't available
+def _current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    # keeps fitted models by name and only unpickles each one the first time it is used
+    def __init__(self, loader=joblib.load):
+        self.loader = loader
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, path):
+        with self.lock:
+            self.entries[name] = {"path": path, "model": None, "lock": threading.Lock(), "load_time": None, "memory_bytes": None}
+
+    def names(self):
+        return list(self.entries)
+
+    def is_loaded(self, name):
+        return self.entries[name]["model"] is not None
+
+    def get(self, name):
+        if name not in self.entries:
+            raise KeyError(f"Unknown model {name!r}, registered models are {self.names()}")
+        entry = self.entries[name]
+        if entry["model"] is None:
+            # each model has its own lock so two threads never unpickle the same file twice
+            with entry["lock"]:
+                if entry["model"] is None:
+                    rss_before = _current_rss()
+                    start = time.perf_counter()
+                    model = self.loader(entry["path"])
+                    entry["load_time"] = time.perf_counter() - start
+                    rss_after = _current_rss()
+                    # rss delta is approximate, other threads can allocate while this one loads
+                    if rss_before is not None and rss_after is not None:
+                        entry["memory_bytes"] = max(rss_after - rss_before, 0)
+                    entry["model"] = model
+        return entry["model"]
+
+    # loads models ahead of time, in a daemon thread when background is set
+    def warm_up(self, names=None, background=False):
+        names = self.names() if names is None else list(names)
+
+        def load_all():
+            for name in names:
+                self.get(name)
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    # per model load time in seconds and approximate memory in MB, None until loaded
+    def stats(self):
+        return {
+            name: {
+                "path": entry["path"],
+                "loaded": entry["model"] is not None,
+                "load_time": entry["load_time"],
+                "memory_mb": None if entry["memory_bytes"] is None else entry["memory_bytes"] / 2**20
+            }
+            for name, entry in self.entries.items()
+        }
@@ -0,0 +1,299 @@
+# json over http access to LolPredictor for other services, stdlib asyncio only
+# the predictor is loaded once. concurrent requests are grouped into micro batches that close when they reach
+# --max-batch-size requests or --max-wait-ms after the first one arrived, and each batch builds its features once
+# and makes one predict_proba call per model
+#   POST /predict  a match_info as made by LolPredictor.create_match_info, returns {model: {predicted_winner, blue_win_probability}}
+#   GET /metrics   request, batch and latency counters, plus per stage timings with --instrument
+#   GET /health
+# python server.py --port 8080
+import argparse
+import asyncio
+import json
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from instrumentation import Instruments
+from player_stats import ROLES
+from predictor import BACKENDS, LolPredictor
+
+MODELS = ("voting", "elastic")
+MAX_BODY_BYTES = 1 << 20
+# how many recent request latencies the percentiles are taken over
+LATENCY_WINDOW = 10_000
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# raises ValueError unless match_info has every field build_feature_matrix reads
+def check_match_info(match_info):
+    if not isinstance(match_info, dict):
+        raise ValueError("body should be a json object")
+    for field in ("patch", "region", "blue_team", "red_team"):
+        if field not in match_info:
+            raise ValueError(f"missing {field!r}")
+    if not isinstance(match_info["region"], str):
+        raise ValueError("region should be a string")
+    # patches come as "14.1" or 14.1, a bool is an int to isinstance but never a patch
+    patch = match_info["patch"]
+    if isinstance(patch, bool) or not isinstance(patch, (str, int, float)):
+        raise ValueError("patch should be a string or a number")
+    for side in ("blue_team", "red_team"):
+        team = match_info[side]
+        if not isinstance(team, dict) or not isinstance(team.get("team_name"), str):
+            raise ValueError(f"{side} needs a team_name")
+        for group in ("players", "champions"):
+            names = team.get(group)
+            if not isinstance(names, dict) or not all(isinstance(names.get(role), str) for role in ROLES):
+                raise ValueError(f"{side} {group} needs a name for each of {ROLES}")
+
+
+class ServerMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque(maxlen=LATENCY_WINDOW)
+
+    def record_request(self, started, ok):
+        now = time.perf_counter()
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(now - started)
+        self.finished.append(now)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+        self.largest_batch = max(self.largest_batch, size)
+
+    def snapshot(self):
+        now = time.perf_counter()
+        latencies = np.array(self.latencies)
+        # throughput over the window of recent requests, or since start while the window isn't full
+        window_start = self.finished[0] if len(self.finished) == self.finished.maxlen else self.started
+        return {
+            "uptime_seconds": now - self.started,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)) * 1000 if len(latencies) else None,
+                "p99": float(np.percentile(latencies, 99)) * 1000 if len(latencies) else None
+            },
+            "throughput_per_second": len(self.finished) / (now - window_start) if now > window_start else 0.0
+        }
+
+
+class MicroBatcher:
+    # scoring runs in one worker thread so the event loop keeps reading requests while a batch is in the models
+    def __init__(self, predictor, models=MODELS, max_batch_size=64, max_wait=0.002, metrics=None):
+        self.predictor = predictor
+        self.models = models
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(1)
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.executor.shutdown()
+
+    # resolves to {model: result} for one match
+    async def predict(self, match_info):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((match_info, future))
+        return await future
+
+    async def next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # take whatever is already waiting without yielding, then wait out the rest of max_wait
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    # one feature build and one predict_proba per model for the batch. if any match in it is bad the batch is
+    # scored again one match at a time so only the bad requests fail
+    def score(self, match_infos):
+        try:
+            scored = self.predictor.score_models(match_infos, self.models)
+            return [{name: scored[name][i] for name in self.models} for i in range(len(match_infos))]
+        except Exception:
+            if len(match_infos) == 1:
+                raise
+        results = []
+        for match_info in match_infos:
+            try:
+                results.append(self.score([match_info])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.next_batch()
+            if self.metrics is not None:
+                self.metrics.record_batch(len(batch))
+            try:
+                results = await loop.run_in_executor(self.executor, self.score, [match_info for match_info, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class PredictionServer:
+    def __init__(self, predictor, models=MODELS, max_batch_size=64, max_wait=0.002):
+        self.metrics = ServerMetrics()
+        self.batcher = MicroBatcher(predictor, models, max_batch_size, max_wait, self.metrics)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            metrics = self.metrics.snapshot()
+            # per stage timings of the predictor when it was started with --instrument
+            instruments = self.batcher.predictor.instruments
+            if instruments.enabled:
+                metrics["stages"] = instruments.snapshot()
+            return 200, metrics
+        if path != "/predict":
+            return 404, {"error": f"no route {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        started = time.perf_counter()
+        try:
+            match_info = json.loads(body)
+            check_match_info(match_info)
+            result = await self.batcher.predict(match_info)
+        # unknown teams, players, champions, patches and regions come back from the encoders as ValueError
+        except ValueError as e:
+            self.metrics.record_request(started, ok=False)
+            return 400, {"error": str(e)}
+        except Exception as e:
+            self.metrics.record_request(started, ok=False)
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        self.metrics.record_request(started, ok=True)
+        return 200, result
+
+    # http/1.1 with keep alive, one request at a time per connection
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                request = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length", "0")
+                # the body of a malformed request can't be found, so the connection closes after the reply
+                keep_alive = False
+                if len(request) != 3:
+                    status, payload = 400, {"error": "malformed request line"}
+                elif not length.isdigit():
+                    status, payload = 400, {"error": "malformed content-length"}
+                elif int(length) > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": f"body over {MAX_BODY_BYTES} bytes"}
+                else:
+                    method, path, version = request
+                    body = await reader.readexactly(int(length))
+                    status, payload = await self.route(method, path.split("?", 1)[0], body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                content = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        # dropped connections just close
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    warnings.filterwarnings("ignore")
+    predictor = LolPredictor(backend=args.backend, instruments=Instruments(enabled=args.instrument))
+    # load both models before taking requests
+    for name in MODELS:
+        predictor.get_model(name)
+
+    server = PredictionServer(predictor, MODELS, args.max_batch_size, args.max_wait_ms / 1000)
+    port = await server.start(args.host, args.port)
+    print(f"Serving predictions at http://{args.host}:{port} (batches of up to {args.max_batch_size}, {args.max_wait_ms}ms max wait)", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="1 scores every request on its own")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="how long the first request of a batch waits for others")
+    parser.add_argument("--backend", choices=BACKENDS, default="compiled")
+    parser.add_argument("--instrument", action="store_true", help="time the predictor's stages and add them to /metrics")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# monte carlo odds for best of series and whole brackets on top of LolPredictor
+# every ordered matchup is scored once with a single batched predict, then series are played out as numpy draws
+# over all simulations at once. simulations are split into fixed size shards with their own seed so the same seed
+# gives the same odds on any number of workers
+# python simulator.py --teams "gen.g esports" "bilibili gaming" ... --sims 1000000 --workers 4
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from player_stats import ROLES, SIDES
+
+# "alternate" swaps sides every game, "loser" gives the loser of a game blue side in the next one
+SIDE_RULES = ("alternate", "loser")
+# simulations per shard, fixed so results don't depend on the number of workers
+SHARD_SIZE = 50_000
+# international events, the region of team matchups at worlds and msi
+DEFAULT_REGION = "wr"
+
+
+# {role: {player: champion}} with the champion each player has played most in the role, ties go to the first by name
+# read from the processed games the predictor's encoders were fitted on
+def signature_champions(predictor, path=None):
+    import pandas as pd
+
+    if path is None:
+        from features import PROCESSED_PATH as path
+    games = pd.read_csv(path, usecols=[f"{side}_{role}_{kind}" for side in SIDES for role in ROLES for kind in ("player", "champion")])
+    champions = {}
+    for role in ROLES:
+        player_names = np.asarray(predictor.label_classes["player"][f"{role}_player"])
+        champion_names = np.asarray(predictor.label_classes["champion"][f"{role}_champion"])
+        picks = pd.DataFrame({
+            "player": player_names[np.concatenate([games[f"{side}_{role}_player"].to_numpy() for side in SIDES])],
+            "champion": champion_names[np.concatenate([games[f"{side}_{role}_champion"].to_numpy() for side in SIDES])]
+        })
+        counts = picks.value_counts().rename("games").reset_index()
+        counts = counts.sort_values(["player", "games", "champion"], ascending=[True, False, True]).drop_duplicates("player")
+        champions[role] = dict(zip(counts["player"].tolist(), counts["champion"].tolist()))
+    return champions
+
+
+# players most recently seen in each role for the team, each on their most played champion in that role
+# drafts aren't known before the series, so the default is every player on their comfort pick. two players who
+# share one still both play it, which a real draft wouldn't allow
+def default_lineup(predictor, team_name, champions=None):
+    players = predictor.get_team_players(team_name, order="recent")
+    missing = [role for role in ROLES if not players[role]]
+    if missing:
+        raise ValueError(f"no {', '.join(missing)} player on record for {team_name!r}, pass a lineup for it")
+    if champions is None:
+        champions = signature_champions(predictor)
+    return {
+        "team_name": team_name,
+        "players": {role: players[role][0] for role in ROLES},
+        "champions": {role: champions[role][players[role][0]] for role in ROLES}
+    }
+
+
+# probs[i, j] is the chance team i beats team j with i on blue side, every ordered pair scored in one batch
+def win_matrix(predictor, lineups, model="voting", patch=None, region=DEFAULT_REGION):
+    if patch is None:
+        patch = predictor.get_patches()[-1]
+    n = len(lineups)
+    pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+    match_infos = [predictor.create_match_info(patch, region, lineups[i], lineups[j]) for i, j in pairs]
+    probs = np.full((n, n), 0.5)
+    for (i, j), result in zip(pairs, predictor.predict_many(match_infos, model)):
+        probs[i, j] = result["blue_win_probability"]
+    return probs
+
+
+# exact chance team a wins the series, a is on blue side in game one
+def series_win_probability(probs, a, b, best_of, sides="alternate"):
+    needed = best_of // 2 + 1
+
+    @lru_cache(maxsize=None)
+    def win_from(wins_a, wins_b, a_blue):
+        if wins_a == needed:
+            return 1.0
+        if wins_b == needed:
+            return 0.0
+        p = probs[a, b] if a_blue else 1 - probs[b, a]
+        next_blue = (not a_blue, not a_blue) if sides == "alternate" else (False, True)
+        return p * win_from(wins_a + 1, wins_b, next_blue[0]) + (1 - p) * win_from(wins_a, wins_b + 1, next_blue[1])
+
+    return win_from(0, 0, True)
+
+
+# plays one series per simulation, team_a and team_b are arrays of team indices with team_a on blue side in game one
+# every game is drawn for every simulation so the random stream doesn't depend on how series went
+def simulate_series(probs, team_a, team_b, best_of, rng, sides="alternate"):
+    needed = best_of // 2 + 1
+    n = len(team_a)
+    wins_a = np.zeros(n, dtype=np.int8)
+    wins_b = np.zeros(n, dtype=np.int8)
+    a_blue = np.ones(n, dtype=bool)
+    a_blue_prob = probs[team_a, team_b]
+    a_red_prob = 1 - probs[team_b, team_a]
+
+    for _ in range(best_of):
+        live = (wins_a < needed) & (wins_b < needed)
+        a_won = rng.random(n) < np.where(a_blue, a_blue_prob, a_red_prob)
+        wins_a += a_won & live
+        wins_b += ~a_won & live
+        a_blue = ~a_blue if sides == "alternate" else ~a_won
+
+    a_took = wins_a >= needed
+    return np.where(a_took, team_a, team_b), np.where(a_took, team_b, team_a)
+
+
+# a bracket is {match name: {"teams": [slot, slot], "best_of": 5}} where a slot is a team name,
+# "winner:<match>" or "loser:<match>". the first slot has blue side in game one
+# returns the teams in order and the matches as (name, best_of, slot, slot) in an order they can be played in,
+# with slots as ("team", team index) or ("winner" / "loser", match index)
+def compile_bracket(bracket):
+    teams = []
+    for match in bracket.values():
+        for slot in match["teams"]:
+            if ":" not in slot and slot not in teams:
+                teams.append(slot)
+
+    order = {}
+    matches = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in bracket:
+            raise ValueError(f"bracket has no match {name!r}")
+        if name in visiting:
+            raise ValueError(f"match {name!r} depends on itself")
+        visiting.add(name)
+        match = bracket[name]
+        if len(match["teams"]) != 2:
+            raise ValueError(f"match {name!r} needs two teams")
+        slots = []
+        for slot in match["teams"]:
+            if ":" in slot:
+                outcome, source = slot.split(":", 1)
+                if outcome not in ("winner", "loser"):
+                    raise ValueError(f"slot {slot!r} in match {name!r} should start with winner: or loser:")
+                visit(source)
+                slots.append((outcome, order[source]))
+            else:
+                slots.append(("team", teams.index(slot)))
+        best_of = match.get("best_of", 1)
+        if best_of < 1 or best_of % 2 == 0:
+            raise ValueError(f"match {name!r} best_of should be odd, got {best_of}")
+        visiting.discard(name)
+        order[name] = len(matches)
+        matches.append((name, best_of, slots[0], slots[1]))
+
+    for name in bracket:
+        visit(name)
+    return teams, matches
+
+
+# the match whose winner doesn't play again, the winner of it takes the title
+def final_match(bracket):
+    referenced = {slot.split(":", 1)[1] for match in bracket.values() for slot in match["teams"] if slot.startswith("winner:")}
+    finals = [name for name in bracket if name not in referenced]
+    if len(finals) != 1:
+        raise ValueError(f"bracket should have one final, found {finals}")
+    return finals[0]
+
+
+# seeded single elimination, teams listed in bracket order so neighbours meet in the first round
+def single_elimination(teams, best_of=5):
+    if len(teams) < 2 or len(teams) & (len(teams) - 1):
+        raise ValueError(f"single elimination needs a power of two teams, got {len(teams)}")
+    bracket = {}
+    slots = list(teams)
+    round_number = 1
+    while len(slots) > 1:
+        names = [f"R{round_number}M{i + 1}" for i in range(len(slots) // 2)]
+        if len(slots) == 2:
+            names = ["final"]
+        for i, name in enumerate(names):
+            bracket[name] = {"teams": [slots[2 * i], slots[2 * i + 1]], "best_of": best_of}
+        slots = [f"winner:{name}" for name in names]
+        round_number += 1
+    return bracket
+
+
+# counts how often each team plays and wins each match over n simulations
+def run_shard(probs, matches, n, seed, sides):
+    rng = np.random.default_rng(seed)
+    n_teams = len(probs)
+    played = np.zeros((len(matches), n_teams), dtype=np.int64)
+    won = np.zeros((len(matches), n_teams), dtype=np.int64)
+    winners, losers = [], []
+
+    for _, best_of, slot_a, slot_b in matches:
+        teams = []
+        for kind, index in (slot_a, slot_b):
+            if kind == "team":
+                teams.append(np.full(n, index, dtype=np.int64))
+            else:
+                teams.append(winners[index] if kind == "winner" else losers[index])
+        winner, loser = simulate_series(probs, teams[0], teams[1], best_of, rng, sides)
+        m = len(winners)
+        played[m] = np.bincount(teams[0], minlength=n_teams) + np.bincount(teams[1], minlength=n_teams)
+        won[m] = np.bincount(winner, minlength=n_teams)
+        winners.append(winner)
+        losers.append(loser)
+    return played, won
+
+
+class BracketSimulator:
+    # lineups maps team names to match_info team dicts, teams left out get default_lineup
+    def __init__(self, predictor, bracket, lineups=None, model="voting", patch=None, region=DEFAULT_REGION, sides="alternate"):
+        if sides not in SIDE_RULES:
+            raise ValueError(f"sides must be one of {SIDE_RULES}, got {sides!r}")
+        self.bracket = bracket
+        self.sides = sides
+        self.teams, self.matches = compile_bracket(bracket)
+        self.final = final_match(bracket)
+        lineups = lineups or {}
+        # the processed games are only read when some team needs a default lineup
+        champions = signature_champions(predictor) if any(not lineups.get(team) for team in self.teams) else None
+        self.lineups = [lineups.get(team) or default_lineup(predictor, team, champions) for team in self.teams]
+        self.probs = win_matrix(predictor, self.lineups, model, patch, region)
+
+    # exact series odds for two teams of the bracket, team_a on blue side in game one
+    def series_odds(self, team_a, team_b, best_of):
+        return series_win_probability(self.probs, self.teams.index(team_a), self.teams.index(team_b), best_of, self.sides)
+
+    # plays the bracket sims times and returns per team odds of playing and winning every match and of the title
+    def run(self, sims, seed=0, workers=1):
+        shards = [SHARD_SIZE] * (sims // SHARD_SIZE) + ([sims % SHARD_SIZE] if sims % SHARD_SIZE else [])
+        seeds = np.random.SeedSequence(seed).spawn(len(shards))
+        args = [(self.probs, self.matches, n, shard_seed, self.sides) for n, shard_seed in zip(shards, seeds)]
+
+        if workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(min(workers, len(shards))) as pool:
+                counts = list(pool.map(run_shard, *zip(*args)))
+        else:
+            counts = [run_shard(*shard_args) for shard_args in args]
+        played = sum(shard_played for shard_played, _ in counts)
+        won = sum(shard_won for _, shard_won in counts)
+
+        final_index = [name for name, *_ in self.matches].index(self.final)
+        return {
+            "sims": sims,
+            "seed": seed,
+            "title": {team: float(won[final_index, i] / sims) for i, team in enumerate(self.teams)},
+            "matches": {
+                name: {team: {"plays": float(played[m, i] / sims), "wins": float(won[m, i] / sims)} for i, team in enumerate(self.teams) if played[m, i]}
+                for m, (name, *_) in enumerate(self.matches)
+            }
+        }
+
+
+def main():
+    from predictor import LolPredictor
+
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--teams", nargs="+", help="seeded single elimination, teams in bracket order")
+    source.add_argument("--bracket", help="json file with {match: {teams: [slot, slot], best_of: n}}")
+    parser.add_argument("--best-of", type=int, default=5, help="series length for --teams")
+    parser.add_argument("--lineups", help="json file with {team: {players: {role: name}, champions: {role: name}}}")
+    parser.add_argument("--model", default="voting")
+    parser.add_argument("--patch")
+    parser.add_argument("--region", default=DEFAULT_REGION)
+    parser.add_argument("--sides", choices=SIDE_RULES, default="alternate")
+    parser.add_argument("--sims", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the odds as json")
+    args = parser.parse_args()
+
+    if args.bracket:
+        with open(args.bracket) as f:
+            bracket = json.load(f)
+    else:
+        bracket = single_elimination(args.teams, args.best_of)
+    lineups = {}
+    if args.lineups:
+        with open(args.lineups) as f:
+            lineups = {team: {"team_name": team, **lineup} for team, lineup in json.load(f).items()}
+
+    start = time.perf_counter()
+    simulator = BracketSimulator(LolPredictor(), bracket, lineups, args.model, args.patch, args.region, args.sides)
+    scored = time.perf_counter()
+    odds = simulator.run(args.sims, args.seed, args.workers)
+    done = time.perf_counter()
+
+    print(f"{args.sims} brackets in {done - scored:.2f}s on {args.workers} workers ({scored - start:.2f}s loading and scoring matchups)")
+    for team, title in sorted(odds["title"].items(), key=lambda item: -item[1]):
+        print(f"{team:>32} {title:>7.2%}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(odds, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# the predictor reads models/ and data/ relative to the repo root, and the scrapers import their data/ siblings plainly
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "data"))
+os.chdir(ROOT)
@@ -0,0 +1,111 @@
+# LolPredictor.build_feature_matrix has to give exactly the rows the original predictor built one match at a time:
+# a dict of the encoded names, elo and historical averages per match, then
+# pd.DataFrame([row]).reindex(columns=feature_columns, fill_value=0.0), with the pickled sklearn encoders and the csv
+import random
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.common import make_match_infos
+from predictor import ROLES, STAT_COLUMNS, LolPredictor
+
+MATCHES = 100
+
+
+class ReferenceFeatures:
+    def __init__(self):
+        self.encoders = {
+            "champion": joblib.load("models/champion_encoders.pkl"),
+            "player": joblib.load("models/player_encoders.pkl"),
+            "team": joblib.load("models/team_encoder.pkl"),
+            "region": joblib.load("models/region_encoder.pkl"),
+            "patch": joblib.load("models/patch_encoder.pkl")
+        }
+        self.final_team_elos = joblib.load("models/final_team_elos.pkl")
+        self.feature_columns = joblib.load("models/feature_columns.pkl")
+        self.df_original = pd.read_csv("data/processed_historical_data.csv")
+
+    # the player's mean over their games in the role on either side, or the mean of both sides without games
+    def player_stats(self, player_name, role):
+        df = self.df_original
+        encoded_player = self.encoders["player"][f"{role}_player"].transform([player_name.lower()])[0]
+        blue_games = df[df[f"blue_{role}_player"] == encoded_player]
+        red_games = df[df[f"red_{role}_player"] == encoded_player]
+        stats = {}
+        for stat in STAT_COLUMNS:
+            values = blue_games[f"blue_{role}_{stat}"].tolist() + red_games[f"red_{role}_{stat}"].tolist()
+            if values:
+                stats[stat] = sum(values) / len(values)
+            else:
+                stats[stat] = (df[f"blue_{role}_{stat}"].mean() + df[f"red_{role}_{stat}"].mean()) / 2
+        return stats
+
+    def row(self, match_info):
+        row = {}
+        for name, prefix, value in [("patch", "Patch", str(match_info["patch"])), ("region", "Region", match_info["region"].lower())]:
+            encoded = self.encoders[name].transform(pd.DataFrame({prefix: [value]}))
+            for i, feature_name in enumerate(self.encoders[name].get_feature_names_out([prefix])):
+                row[feature_name] = encoded[0][i]
+        for color in ["blue", "red"]:
+            team = match_info[f"{color}_team"]
+            encoded_team = self.encoders["team"].transform([team["team_name"].lower()])[0]
+            row[f"{color}_team_elo_rating"] = self.final_team_elos[encoded_team]
+            row[f"{color}_Team"] = encoded_team
+            for role in ROLES:
+                row[f"{color}_{role}_player"] = self.encoders["player"][f"{role}_player"].transform([team["players"][role].lower()])[0]
+                row[f"{color}_{role}_champion"] = self.encoders["champion"][f"{role}_champion"].transform([team["champions"][role].lower()])[0]
+                for stat, value in self.player_stats(team["players"][role], role).items():
+                    row[f"{color}_{role}_historical_avg_{stat}"] = value
+        return row
+
+    def matrix(self, match_infos):
+        frames = [pd.DataFrame([self.row(match_info)]).reindex(columns=self.feature_columns, fill_value=0.0) for match_info in match_infos]
+        return np.vstack([frame.to_numpy(dtype=np.float64) for frame in frames])
+
+
+# random matchups with any player of the role, not just ones the team fielded
+def mixed_match_infos(predictor, n, seed):
+    rng = random.Random(seed)
+    players = {role: predictor.get_players(role) for role in ROLES}
+    match_infos = make_match_infos(predictor, n, seed)
+    for match_info in match_infos:
+        for side in ["blue_team", "red_team"]:
+            match_info[side]["players"] = {role: rng.choice(players[role]) for role in ROLES}
+    return match_infos
+
+
+@pytest.fixture(scope="module")
+def reference():
+    warnings.filterwarnings("ignore")
+    return ReferenceFeatures()
+
+
+@pytest.fixture(scope="module", params=["models/bundle", None], ids=["bundle", "pickles"])
+def predictor(request):
+    warnings.filterwarnings("ignore")
+    return LolPredictor(bundle_path=request.param)
+
+
+@pytest.mark.parametrize("match_infos", [make_match_infos, mixed_match_infos], ids=["rosters", "mixed"])
+def test_matches_per_match_dataframe(predictor, reference, match_infos):
+    match_infos = match_infos(predictor, MATCHES, 0)
+    expected = reference.matrix(match_infos)
+    assert list(predictor.feature_columns) == list(reference.feature_columns)
+    batched = predictor.build_feature_matrix(match_infos)
+    assert batched.shape == expected.shape
+    assert np.array_equal(batched, expected), f"max abs diff {np.abs(batched - expected).max()}"
+    for i, match_info in enumerate(match_infos[:20]):
+        assert np.array_equal(predictor.build_feature_matrix([match_info]), expected[i:i + 1])
+
+
+# unknown names fail in both, the way LabelEncoder.transform does
+@pytest.mark.parametrize("field, value", [("patch", "9.99"), ("region", "atlantis")])
+def test_unknown_values_raise(predictor, reference, field, value):
+    match_info = dict(make_match_infos(predictor, 1)[0], **{field: value})
+    with pytest.raises(ValueError):
+        predictor.build_feature_matrix([match_info])
+    with pytest.raises(ValueError):
+        reference.matrix([match_info])
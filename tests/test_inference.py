@@ -0,0 +1,33 @@
+# the compiled backend has to give the probabilities of the fitted sklearn pipelines it is built from
+import warnings
+
+import numpy as np
+import pytest
+
+from benchmarks.common import make_match_infos
+from predictor import LolPredictor
+
+TOLERANCE = 1e-9
+MATCHES = 2000
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    warnings.filterwarnings("ignore")
+    return LolPredictor(backend="compiled")
+
+
+@pytest.fixture(scope="module")
+def features(predictor):
+    return predictor.build_feature_matrix(make_match_infos(predictor, MATCHES))
+
+
+@pytest.mark.parametrize("name", ["voting", "elastic"])
+def test_compiled_matches_sklearn(predictor, features, name):
+    compiled = predictor.get_model(name)
+    model = compiled.sklearn_model
+    expected = model.predict_proba(predictor.model_input(model, features))
+    assert np.abs(compiled.predict_proba(features) - expected).max() <= TOLERANCE
+    # single rows go through the same code as batches
+    for i in range(20):
+        assert np.abs(compiled.predict_proba(features[i:i + 1]) - expected[i:i + 1]).max() <= TOLERANCE
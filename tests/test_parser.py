@@ -0,0 +1,29 @@
+# the streaming parser has to give the BeautifulSoup parser's team stats and rows, field for field, on every saved game page
+import glob
+import os
+
+import pytest
+
+from fixture_server import FIXTURES_PATH
+from scraper import parse_fullstats, parse_team_stats
+
+GAME_PATHS = sorted(glob.glob(os.path.join(FIXTURES_PATH, "game", "stats", "*")))
+
+
+@pytest.mark.parametrize("game_path", GAME_PATHS, ids=os.path.basename)
+def test_fast_parser_matches_soup(game_path):
+    game_id = int(os.path.basename(game_path))
+    with open(os.path.join(game_path, "page-game", "index.html"), encoding="utf-8") as f:
+        game_html = f.read()
+    with open(os.path.join(game_path, "page-fullstats", "index.html"), encoding="utf-8") as f:
+        fullstats_html = f.read()
+
+    soup_stats = parse_team_stats(game_html, "soup")
+    fast_stats = parse_team_stats(game_html, "fast")
+    assert fast_stats == soup_stats
+
+    soup_rows = parse_fullstats(fullstats_html, game_id, soup_stats, "soup")
+    fast_rows = parse_fullstats(fullstats_html, game_id, fast_stats, "fast")
+    assert len(fast_rows) == len(soup_rows)
+    for soup_row, fast_row in zip(soup_rows, fast_rows):
+        assert fast_row == soup_row, soup_row["Champion"]
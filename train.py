@@ -0,0 +1,276 @@
+# model selection from test_models.ipynb as a script: every (candidate, fold) fit runs in a process pool
+# folds are time ordered by GameID, each one validates on the games right after the ones it trains on, and the
+# last --test-size of games is only used once the winners are refit. fitted scalers are shared between candidates
+# through the pipeline memory cache, and every finished fit is appended to results.jsonl so a killed run resumes
+#   python train.py                         search, then export the winners to models/ for LolPredictor
+#   python train.py --grid grid.json        {"voting": {"classifier__xgb__max_depth": [3, 4]}, ...}
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import VotingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils import ClassifierTags, get_tags
+
+from features import PROCESSED_PATH, model_features
+
+# file names LolPredictor.load_pickles reads
+MODEL_FILES = {"voting": "voting_ensemble_model.pkl", "elastic": "elastic_net_model.pkl"}
+# the notebook's grids around the parameters the shipped models use
+DEFAULT_GRIDS = {
+    "elastic": {
+        "classifier__C": [0.01, 0.05, 0.1, 0.5, 1],
+        "classifier__l1_ratio": [0.1, 0.3, 0.5, 0.7, 0.9]
+    },
+    "voting": {
+        "classifier__elastic__C": [0.05, 0.1],
+        "classifier__elastic__l1_ratio": [0.5, 0.9],
+        "classifier__xgb__n_estimators": [30, 50],
+        "classifier__xgb__learning_rate": [0.03, 0.05],
+        "classifier__xgb__max_depth": [3, 4]
+    }
+}
+
+# xgboost 2.1.3 from requirements.txt predates the sklearn 1.6 estimator tags, so sklearn 1.7's VotingClassifier
+# refuses to fit it as "not a classifier". the tags are added back for this process only, pickles stay plain XGBClassifiers
+if get_tags(xgb.XGBClassifier()).estimator_type is None:
+    def _classifier_tags(self):
+        tags = xgb.XGBModel.__sklearn_tags__(self)
+        tags.estimator_type = "classifier"
+        tags.classifier_tags = ClassifierTags()
+        tags.target_tags.required = True
+        return tags
+
+    xgb.XGBClassifier.__sklearn_tags__ = _classifier_tags
+
+# data shared with the workers once instead of pickled with every task
+_data = {}
+
+
+# the notebook's pipelines, params are set on top of the parameters it settled on
+def build_model(name, params, memory=None):
+    elastic = LogisticRegression(random_state=42, penalty="elasticnet", solver="saga", C=0.05, l1_ratio=0.9, max_iter=1000)
+    if name == "elastic":
+        classifier = elastic
+    else:
+        classifier = VotingClassifier([
+            ("elastic", elastic),
+            ("xgb", xgb.XGBClassifier(
+                random_state=42, n_estimators=50, learning_rate=0.05, max_depth=3, reg_alpha=0.3, reg_lambda=0.3,
+                subsample=0.7, colsample_bytree=0.8, eval_metric="logloss"
+            ))
+        ], voting="soft")
+    return Pipeline([("scaler", StandardScaler()), ("classifier", classifier)], memory=memory).set_params(**params)
+
+
+def candidates(grids, names):
+    for name in names:
+        grid = grids[name]
+        for values in itertools.product(*grid.values()):
+            yield name, dict(zip(grid, values))
+
+
+def candidate_key(name, params):
+    return f"{name} {json.dumps(params, sort_keys=True)}"
+
+
+# time ordered folds over the games before the test block, as (train rows, validation rows)
+def time_folds(game_ids, folds, test_size):
+    order = np.argsort(game_ids, kind="stable")
+    test_start = len(order) - int(round(len(order) * test_size))
+    splits = [(order[train], order[validation]) for train, validation in TimeSeriesSplit(n_splits=folds).split(order[:test_start])]
+    return splits, order[:test_start], order[test_start:]
+
+
+# results only count for the data and folds they were computed on
+def data_fingerprint(features, labels, game_ids, folds, test_size):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(features.columns), folds, test_size]).encode())
+    digest.update(np.ascontiguousarray(game_ids).tobytes())
+    digest.update(np.ascontiguousarray(features.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(labels.to_numpy()).tobytes())
+    return digest.hexdigest()[:16]
+
+
+# finished fits of an earlier run, a line cut off by a kill is skipped
+def read_results(path, fingerprint):
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if result.get("data") == fingerprint:
+                results[(result["candidate"], result["fold"])] = result
+    return results
+
+
+def init_worker(features, labels):
+    _data["features"] = features
+    _data["labels"] = labels
+
+
+def fit_fold(name, params, fold, train_rows, validation_rows, memory):
+    features, labels = _data["features"], _data["labels"]
+    model = build_model(name, params, memory)
+    # the pool already uses every core
+    if name == "voting":
+        model.set_params(classifier__xgb__n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(features.iloc[train_rows], labels.iloc[train_rows])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    blue_win_probs = model.predict_proba(features.iloc[validation_rows])[:, 1]
+    score_seconds = time.perf_counter() - start
+
+    validation_labels = labels.iloc[validation_rows]
+    return {
+        "candidate": candidate_key(name, params), "model": name, "params": params, "fold": fold,
+        "train_games": len(train_rows), "validation_games": len(validation_rows),
+        "accuracy": accuracy_score(validation_labels, blue_win_probs > 0.5),
+        "log_loss": log_loss(validation_labels, blue_win_probs, labels=[0, 1]),
+        "fit_seconds": fit_seconds, "score_seconds": score_seconds
+    }
+
+
+# refits a winner on every game before the test block and scores it on the test block
+def refit(name, params, train_rows, test_rows):
+    features, labels = _data["features"], _data["labels"]
+    model = build_model(name, params)
+    start = time.perf_counter()
+    model.fit(features.iloc[train_rows], labels.iloc[train_rows])
+    fit_seconds = time.perf_counter() - start
+    test_accuracy = accuracy_score(labels.iloc[test_rows], model.predict(features.iloc[test_rows])) if len(test_rows) else None
+    return name, model, {"fit_seconds": fit_seconds, "test_accuracy": test_accuracy}
+
+
+# best mean validation accuracy per model, ties go to the lower log loss
+def summarize(results, names, folds):
+    by_candidate = {}
+    for result in results.values():
+        by_candidate.setdefault((result["model"], result["candidate"]), []).append(result)
+
+    summary = {}
+    for name in names:
+        scored = []
+        for (model, key), fold_results in by_candidate.items():
+            if model != name or len(fold_results) != folds:
+                continue
+            fold_results.sort(key=lambda result: result["fold"])
+            accuracies = [result["accuracy"] for result in fold_results]
+            scored.append({
+                "candidate": key, "params": fold_results[0]["params"],
+                "mean_accuracy": float(np.mean(accuracies)), "std_accuracy": float(np.std(accuracies)),
+                "mean_log_loss": float(np.mean([result["log_loss"] for result in fold_results])),
+                "folds": [{field: result[field] for field in ["fold", "train_games", "validation_games", "accuracy", "log_loss", "fit_seconds", "score_seconds"]} for result in fold_results]
+            })
+        scored.sort(key=lambda candidate: (-candidate["mean_accuracy"], candidate["mean_log_loss"]))
+        summary[name] = {"candidates": len(scored), "best": scored[0] if scored else None}
+    return summary
+
+
+def export_models(models, feature_columns, export_dir):
+    os.makedirs(export_dir, exist_ok=True)
+    for name, model in models.items():
+        path = os.path.join(export_dir, MODEL_FILES[name])
+        # written to a temporary file and swapped in so the app never loads a half written model
+        joblib.dump(model, path + ".tmp")
+        os.replace(path + ".tmp", path)
+    joblib.dump(feature_columns, os.path.join(export_dir, "feature_columns.pkl.tmp"))
+    os.replace(os.path.join(export_dir, "feature_columns.pkl.tmp"), os.path.join(export_dir, "feature_columns.pkl"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=PROCESSED_PATH, help="processed rows written by python features.py build")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES), default=list(MODEL_FILES))
+    parser.add_argument("--grid", help="json file with a parameter grid per model, replaces the default grids")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.2, help="share of the latest games held out for the final test")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--run-dir", default="training_runs/latest", help="results.jsonl, summary.json and the pipeline cache")
+    parser.add_argument("--export-dir", default="models", help="where the winning models and feature_columns.pkl go")
+    parser.add_argument("--no-export", action="store_true")
+    args = parser.parse_args()
+
+    run_start = time.perf_counter()
+    grids = DEFAULT_GRIDS
+    if args.grid:
+        with open(args.grid) as f:
+            grids = {**DEFAULT_GRIDS, **json.load(f)}
+
+    processed = pd.read_csv(args.data)
+    features, labels = model_features(processed)
+    game_ids = processed["GameID"].to_numpy()
+    splits, train_rows, test_rows = time_folds(game_ids, args.folds, args.test_size)
+    fingerprint = data_fingerprint(features, labels, game_ids, args.folds, args.test_size)
+
+    os.makedirs(args.run_dir, exist_ok=True)
+    results_path = os.path.join(args.run_dir, "results.jsonl")
+    results = read_results(results_path, fingerprint)
+    memory = os.path.join(args.run_dir, "pipeline_cache")
+    tasks = [
+        (name, params, fold) for name, params in candidates(grids, args.models) for fold in range(len(splits))
+        if (candidate_key(name, params), fold) not in results
+    ]
+    print(f"{len(results)} fits already done, {len(tasks)} to go on {args.workers} workers")
+
+    search_start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(features, labels)) as pool:
+        futures = [pool.submit(fit_fold, name, params, fold, *splits[fold], memory) for name, params, fold in tasks]
+        with open(results_path, "a") as f:
+            for done, future in enumerate(as_completed(futures), 1):
+                result = {**future.result(), "data": fingerprint}
+                results[(result["candidate"], result["fold"])] = result
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                if done % 20 == 0 or done == len(futures):
+                    print(f"{done}/{len(futures)} fits")
+        search_seconds = time.perf_counter() - search_start
+
+        summary = summarize(results, args.models, len(splits))
+        refit_start = time.perf_counter()
+        refits = [pool.submit(refit, name, summary[name]["best"]["params"], train_rows, test_rows) for name in args.models if summary[name]["best"]]
+        models = {}
+        for future in as_completed(refits):
+            name, model, refit_timings = future.result()
+            models[name] = model
+            summary[name]["refit"] = refit_timings
+        refit_seconds = time.perf_counter() - refit_start
+
+    # export first so a failing print can't lose the refit models
+    if not args.no_export:
+        export_models(models, list(features.columns), args.export_dir)
+        print(f"Exported {', '.join(MODEL_FILES[name] for name in models)} and feature_columns.pkl to {args.export_dir}, re-export the bundle with python bundle.py")
+
+    for name in models:
+        best = summary[name]["best"]
+        # no test games are held out with --test-size 0
+        test_accuracy = summary[name]["refit"]["test_accuracy"]
+        test_accuracy = "n/a" if test_accuracy is None else f"{test_accuracy:.4f}"
+        print(f"{name}: {best['params']} cv accuracy {best['mean_accuracy']:.4f} (+/- {best['std_accuracy'] * 2:.4f}), test accuracy {test_accuracy}")
+
+    timings = {"wall_seconds": time.perf_counter() - run_start, "search_seconds": search_seconds, "refit_seconds": refit_seconds, "fits_run": len(tasks)}
+    with open(os.path.join(args.run_dir, "summary.json"), "w") as f:
+        json.dump({"data": fingerprint, "games": {"train": len(train_rows), "test": len(test_rows)}, "timings": timings, "models": summary}, f, indent=2)
+    print(f"Done in {timings['wall_seconds']:.1f}s ({timings['search_seconds']:.1f}s search, {timings['refit_seconds']:.1f}s refit)")
+
+
+if __name__ == "__main__":
+    main()